@@ -0,0 +1,169 @@
+# ReStep Footwear — generator benchmark
+# Runs generate_restep_docx.py repeatedly at several FIG_SCALE/DPI settings and chart
+# counts, each run in a fresh interpreter, and compares the medians against a stored baseline.
+#
+# Usage:
+#   python benchmark_restep_docx.py --save-baseline      # record benchmarks/baseline.json
+#   python benchmark_restep_docx.py                      # exit 1 if anything regressed (or no baseline)
+#   python benchmark_restep_docx.py --runs 5 --workers 2 --cases full-5.0x180,charts-4
+#
+# Metrics per case: wall time (median of --runs), peak RSS of the run including its render
+# workers (max), output bytes (DOCX size, or total PNG bytes for chart-only cases), and the
+# median per-stage totals from the generator's --trace output (reported, not gated).
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GENERATOR = os.path.join(HERE, "generate_restep_docx.py")
+BASELINE = os.path.join(HERE, "benchmarks", "baseline.json")
+
+# Allowed growth over the baseline before a metric counts as a regression.
+TOLERANCE = {"wall_s": 0.25, "peak_rss_mb": 0.15, "output_bytes": 0.05}
+
+# "full" cases build the whole DOCX; "charts" cases render only the first N chart jobs.
+CASES = [
+    {"name": "full-4.0x120", "kind": "full", "fig_scale": 4.0, "dpi": 120},
+    {"name": "full-5.0x180", "kind": "full", "fig_scale": 5.0, "dpi": 180},
+    {"name": "full-6.0x240", "kind": "full", "fig_scale": 6.0, "dpi": 240},
+    {"name": "charts-1", "kind": "charts", "fig_scale": 5.0, "dpi": 180, "charts": 1},
+    {"name": "charts-4", "kind": "charts", "fig_scale": 5.0, "dpi": 180, "charts": 4},
+]
+
+# Chart-only runs go through the same settings, rendering path and trace as a full build.
+CHARTS_SNIPPET = """
+import sys, generate_restep_docx as g
+g.FIG_SCALE, g.DPI, g.FAST_START, g.TRACING = {fig_scale!r}, {dpi!r}, {fast_start!r}, True
+jobs = g.collect_chart_jobs(g.assumptions)[:{charts}]
+with g.span("render_charts", "stage"):
+    figs = g.render_charts(jobs, workers={workers!r})
+open({output!r}, "w").write(str(sum(map(len, figs.values()))))
+g.write_trace({trace!r})
+"""
+
+def _command(case, output, trace, args):
+    if case["kind"] == "full":
+        cmd = [sys.executable, GENERATOR, "--no-cache", "--output", output, "--trace", trace,
+               "--fig-scale", str(case["fig_scale"]), "--dpi", str(case["dpi"])]
+        if args.workers is not None:
+            cmd += ["--workers", str(args.workers)]
+        return cmd + (["--fast-start"] if args.fast_start else [])
+    code = CHARTS_SNIPPET.format(fig_scale=case["fig_scale"], dpi=case["dpi"], fast_start=args.fast_start,
+                                 charts=case["charts"], workers=args.workers, output=output, trace=trace)
+    return [sys.executable, "-c", code]
+
+# Runs one command to completion; returns (wall seconds, peak RSS MB of the child and its reaped workers).
+def _measure(cmd, log):
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=HERE, stdout=subprocess.DEVNULL, stderr=log)
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+    else:
+        proc.wait(); rss = None
+    return time.perf_counter() - start, rss, proc.returncode
+
+def _stage_totals(trace):
+    totals = defaultdict(float)
+    with open(trace, encoding="utf-8") as f:
+        for e in json.load(f)["traceEvents"]:
+            if e["ph"] == "X" and e["cat"] in ("stage", "render", "docx", "startup"):
+                totals[e["name"]] += e["dur"] / 1e6
+    return totals
+
+def run_case(case, args):
+    walls, rss, sizes, stages = [], [], [], defaultdict(list)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "out.docx" if case["kind"] == "full" else "bytes.txt")
+        trace = os.path.join(tmp, "trace.json")
+        for _ in range(args.runs):
+            with open(os.path.join(tmp, "stderr.log"), "w+") as log:
+                wall, peak, code = _measure(_command(case, output, trace, args), log)
+                if code:
+                    log.seek(0); sys.exit(f"{case['name']} failed (exit {code}):\n{log.read()}")
+            walls.append(wall); rss.append(peak)
+            if case["kind"] == "full":
+                sizes.append(os.path.getsize(output))
+            else:
+                with open(output) as f:
+                    sizes.append(int(f.read()))
+            for name, seconds in _stage_totals(trace).items():
+                stages[name].append(seconds)
+    return {
+        "wall_s": round(statistics.median(walls), 3),
+        "peak_rss_mb": None if None in rss else round(max(rss), 1),
+        "output_bytes": max(sizes),
+        "stages_s": {name: round(statistics.median(v), 3) for name, v in sorted(stages.items())},
+    }
+
+def compare(results, baseline):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base:
+            continue
+        for metric, tolerance in TOLERANCE.items():
+            now, before = result.get(metric), base.get(metric)
+            if now is not None and before and now > before * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before} -> {now} (+{(now / before - 1) * 100:.0f}%, limit +{tolerance * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark generate_restep_docx.py against a stored baseline.")
+    parser.add_argument("--runs", type=int, default=3, help="runs per case; wall time is the median (default: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="rendering processes passed to the generator (default: 1, serial)")
+    parser.add_argument("--fast-start", action="store_true", help="benchmark the --fast-start styling path")
+    parser.add_argument("--cases", help="comma-separated case names to run (default: all)")
+    parser.add_argument("--baseline", default=BASELINE, help=f"baseline file (default: {os.path.relpath(BASELINE, HERE)})")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline instead of comparing")
+    parser.add_argument("--allow-missing-baseline", action="store_true", help="exit 0 when there is no baseline to compare against")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    selected = set(args.cases.split(",")) if args.cases else None
+    cases = [c for c in CASES if selected is None or c["name"] in selected]
+    if selected and len(cases) != len(selected):
+        parser.error(f"unknown case(s): {', '.join(sorted(selected - {c['name'] for c in cases}))}")
+
+    results = {}
+    print(f"{'case':<14} {'wall s':>8} {'peak RSS MB':>12} {'output bytes':>13}")
+    for case in cases:
+        results[case["name"]] = r = run_case(case, args)
+        print(f"{case['name']:<14} {r['wall_s']:>8.2f} {r['peak_rss_mb'] or 0:>12.1f} {r['output_bytes']:>13,}")
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "runs": args.runs,
+              "workers": args.workers, "fast_start": args.fast_start, "cases": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return 0 if args.allow_missing_baseline else 1
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for setting in ("workers", "fast_start"):
+        if baseline.get(setting) != report[setting]:
+            sys.exit(f"Baseline was recorded with {setting}={baseline.get(setting)!r}, this run used {report[setting]!r}; "
+                     "rerun with the same settings or --save-baseline")
+    regressions = compare(results, baseline)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print("Benchmark: regressions found" if regressions else "Benchmark: no regressions against baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,39 @@
 #
 # Usage:
 #   pip install -r requirements.txt
-#   python generate_restep_docx.py
+#   python generate_restep_docx.py [--workers N] [--no-cache] [--fast-start] [--output PATH]
+#                                  [--fig-scale 5.0] [--dpi 150] [--trace trace.json]
+#                                  [--image-format png8|png|jpeg] [--max-docx-kb 400] [--image-report]
+#   python generate_restep_docx.py --sections exec,financials [--output PATH]
+#   python generate_restep_docx.py --estimate | --auto-tune
+#   python generate_restep_docx.py --watch [--output PATH]
+#   python generate_restep_docx.py --profile-startup [--fast-start]
+#   python generate_restep_docx.py --orders orders.csv [--orders-state aggregates.json]
+#   python generate_restep_docx.py --batch manifest.json [--batch-report report.json]
 #
 # Output:
 #   ReStep_Footwear_Business_Plan_Pakistan_Final.docx
 
 import os
+import io
+import sys
+import copy
+import json
+import time
+import argparse
+import functools
+import contextlib
+import hashlib
+import inspect
+import linecache
+import traceback
+import subprocess
+import importlib.util
+from importlib import metadata
 from datetime import date
-import tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from docx import Document
 from docx.shared import Inches, Pt
@@ -23,8 +44,98 @@ from docx.enum.style import WD_STYLE_TYPE
 
 OUTPUT_DOCX = "ReStep_Footwear_Business_Plan_Pakistan_Final.docx"
 FIG_SCALE = 5.0
-DPI = 180
-sns.set(style="whitegrid", palette="muted", font_scale=1.0)
+FIG_ASPECT = 0.6  # figure height / width
+DPI = None  # render resolution; None derives it from PRINT_PPI at the displayed width (render_dpi)
+PRINT_PPI = 150  # pixels per displayed inch, enough for print
+STYLE = {"style": "whitegrid", "palette": "muted", "font_scale": 1.0}
+FAST_START = False  # True: style with SEABORN_WHITEGRID_RC instead of importing seaborn
+
+# The rcParams that sns.set(**STYLE) applies, so --fast-start renders the same theme without seaborn
+# (seaborn's default "rocket" image cmap is left out; every chart here names its colormap explicitly).
+SEABORN_WHITEGRID_RC = {
+    "axes.axisbelow": True, "axes.edgecolor": ".8", "axes.grid": True, "axes.labelcolor": ".15",
+    "axes.labelsize": 12.0, "axes.linewidth": 1.25, "axes.titlesize": 12.0,
+    "axes.prop_cycle": "cycler('color', ['#4878D0', '#EE854A', '#6ACC64', '#D65F5F', '#956CB4', "
+                       "'#8C613C', '#DC7EC0', '#797979', '#D5BB67', '#82C6E2'])",
+    "font.sans-serif": ["Arial", "DejaVu Sans", "Liberation Sans", "Bitstream Vera Sans", "sans-serif"],
+    "font.size": 12.0, "grid.color": ".8", "grid.linewidth": 1.0,
+    "legend.fontsize": 11.0, "legend.title_fontsize": 12.0, "lines.solid_capstyle": "round",
+    "patch.edgecolor": "w", "patch.force_edgecolor": True, "text.color": ".15",
+    "xtick.bottom": False, "xtick.color": ".15", "xtick.labelsize": 11.0,
+    "xtick.major.size": 6.0, "xtick.major.width": 1.25, "xtick.minor.size": 4.0, "xtick.minor.width": 1.0,
+    "ytick.left": False, "ytick.color": ".15", "ytick.labelsize": 11.0,
+    "ytick.major.size": 6.0, "ytick.major.width": 1.25, "ytick.minor.size": 4.0, "ytick.minor.width": 1.0,
+}
+
+# Tracing: spans are recorded as Chrome trace-event "complete" events, which chrome://tracing,
+# Perfetto and speedscope show as a timeline / flame graph. Off unless --trace is given.
+TRACING = False
+TRACE_EVENTS = []
+
+@contextlib.contextmanager
+def span(name, cat, **args):
+    if not TRACING:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        TRACE_EVENTS.append({"name": name, "cat": cat, "ph": "X", "ts": start / 1000,
+                             "dur": (time.perf_counter_ns() - start) / 1000, "pid": os.getpid(), "tid": 1, "args": args})
+
+def write_trace(path):
+    names = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 1,
+              "args": {"name": "generator" if pid == os.getpid() else f"render worker {pid}"}}
+             for pid in sorted({e["pid"] for e in TRACE_EVENTS})]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": names + TRACE_EVENTS, "displayTimeUnit": "ms"}, f)
+    print(f"Trace: {len(TRACE_EVENTS)} spans -> {path}")
+
+# matplotlib (and seaborn) are imported on first render only, so builds served entirely
+# from the figure cache never pay for them.
+mpl = None
+
+# Imports matplotlib's object-oriented API (Figure + Agg canvas, no pyplot state machine) and applies the theme.
+def ensure_plotting():
+    global mpl
+    if mpl is not None:
+        return
+    with span("import plotting", "startup", fast_start=FAST_START):
+        import matplotlib
+        import matplotlib.figure, matplotlib.ticker, matplotlib.backends.backend_agg
+        if FAST_START:
+            matplotlib.rcParams.update(SEABORN_WHITEGRID_RC)
+        else:
+            import seaborn as sns
+            sns.set(**STYLE)
+    mpl = matplotlib
+
+# Figures are shown in the DOCX at FIG_SCALE inches wide, capped to the text width, and rendered at
+# PRINT_PPI per displayed inch; more pixels than that would only be scaled away by Word.
+def display_width():
+    return min(FIG_SCALE, TEXT_WIDTH_IN)
+
+def render_dpi():
+    return DPI or round(PRINT_PPI * display_width() / FIG_SCALE)
+
+# Figure pool: charts borrow a pre-sized, cleared figure (FIG_SCALE x FIG_SCALE*FIG_ASPECT at render_dpi) and
+# save_fig hands it back, so each process allocates its figure, Agg canvas and renderer once per geometry.
+_figure_pool = {}  # (width, height, dpi) -> idle figures
+
+def new_figure():
+    ensure_plotting()
+    idle = _figure_pool.setdefault((FIG_SCALE, FIG_SCALE * FIG_ASPECT, render_dpi()), [])
+    if not idle:
+        fig = mpl.figure.Figure(figsize=(FIG_SCALE, FIG_SCALE * FIG_ASPECT), dpi=render_dpi(), layout="constrained")
+        mpl.backends.backend_agg.FigureCanvasAgg(fig); return fig
+    fig = idle.pop(); fig.clear(); return fig
+
+# Rendered figures are kept across runs, keyed by a hash of everything that affects the pixels.
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "restep-figures")
+CACHE_MAX_MB = 200
+DERIVED_CACHE_DIR = None  # this run's cache dir (None with --no-cache); also holds cohort runs and encoded images
+SCENARIO_POINTS = 10  # values per swept parameter; the section 13A sweep covers SCENARIO_POINTS**6 scenarios
 
 assumptions = {
     "ownership": {"Partner A": 0.60, "Partner B": 0.25, "Partner C": 0.15},
@@ -47,6 +158,19 @@ assumptions = {
         "Peshawar": (250, 270),
     },
     "packaging_cost_per_pair": 110,
+    "cohort_model": {
+        "customers": 200_000,
+        "horizon_months": 24,
+        "purchases_per_year": 2.5,  # first-year orders incl. the acquisition order
+        "frequency_shape": 0.5,  # gamma shape of per-customer repeat rates (lower = more uneven)
+        "monthly_churn": 0.04,
+        "exchange_rate": 0.05,
+        "refund_rate": 0.02,
+        "cac_range": (300, 500),
+        "seed": 2025,
+    },
+    "funnel": {"Reach": 10000, "DMs": 1500, "Orders": 300, "Repeat": 100},
+    "order_counts": None,  # {"months", "orders", "repeat_customers"} from --orders; the funnel stays illustrative
     "vendor_terms": {
         "lead_time_days": "5–7 days Karachi→Lahore",
         "payment": "Cash on pickup; 50% advance for premium bales",
@@ -77,22 +201,36 @@ assumptions = {
     ],
 }
 
-assumptions["blended_asp"] = (
-    assumptions["price_bands"]["A"] * assumptions["sales_mix"]["A"]
-    + assumptions["price_bands"]["B"] * assumptions["sales_mix"]["B"]
-    + assumptions["price_bands"]["C"] * assumptions["sales_mix"]["C"]
-)
+# Values computed from the raw assumptions; re-run after overriding any of their inputs.
+def derive_assumptions(a):
+    a["blended_asp"] = (
+        a["price_bands"]["A"] * a["sales_mix"]["A"]
+        + a["price_bands"]["B"] * a["sales_mix"]["B"]
+        + a["price_bands"]["C"] * a["sales_mix"]["C"]
+    )
+    return a
+
+derive_assumptions(assumptions)
 
-def save_fig(path):
-    plt.tight_layout()
-    plt.savefig(path, dpi=DPI, bbox_inches="tight")
-    plt.close()
+# Encodes a pooled figure as PNG in memory and returns it to the pool; figures never touch the filesystem.
+# Constrained layout runs during the draw and makes room for titles, colorbars and legends placed outside
+# the axes, so the PNG keeps the full figure size without a second bbox_inches="tight" pass. The canvas is
+# drawn once and its buffer encoded directly; savefig would lay out and draw a figure with a layout engine twice.
+def save_fig(fig):
+    from PIL import Image
+    buf = io.BytesIO()
+    with span("draw", "render", stages="layout, draw"):
+        fig.canvas.draw()
+    with span("PNG encode", "render"):
+        Image.frombuffer("RGBA", fig.canvas.get_width_height(), fig.canvas.buffer_rgba()).convert("RGB").save(buf, "PNG")
+    _figure_pool[(FIG_SCALE, FIG_SCALE * FIG_ASPECT, render_dpi())].append(fig)
+    return buf.getvalue()
 
-def chart_monthly_revenue_and_capacity(tmpdir, monthly_pairs, blended_asp, capacity_pairs):
+def chart_monthly_revenue_and_capacity(monthly_pairs, blended_asp, capacity_pairs):
     months = np.arange(1, len(monthly_pairs) + 1)
     revenue = np.array(monthly_pairs) * blended_asp
     capacity_util = np.array(monthly_pairs) / capacity_pairs * 100
-    fig, ax1 = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+    fig = new_figure(); ax1 = fig.subplots()
     ax2 = ax1.twinx()
     ax1.plot(months, revenue, marker="o", label="Revenue (PKR)")
     ax2.plot(months, capacity_util, marker="s", color="orange", label="Capacity Utilization (%)")
@@ -101,126 +239,1237 @@ def chart_monthly_revenue_and_capacity(tmpdir, monthly_pairs, blended_asp, capac
     ax2.set_ylabel("Capacity Utilization (%)")
     ax1.set_title("Monthly Revenue and Capacity Utilization (6M)")
     ax1.legend(loc="upper left"); ax2.legend(loc="upper right")
-    path = os.path.join(tmpdir, "fig_revenue_capacity.png"); save_fig(path); return path
+    return save_fig(fig)
 
-def chart_cac_ltv(tmpdir):
-    cac_values = [300, 350, 400, 450, 500]
-    ltv_values = [8570, 10000, 12000, 12855, 14000]  # illustrative
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
-    ax.plot(cac_values, ltv_values, marker="o")
-    ax.set_title("CAC vs LTV (Illustrative)"); ax.set_xlabel("CAC (PKR)"); ax.set_ylabel("LTV (PKR)")
-    path = os.path.join(tmpdir, "fig_cac_ltv.png"); save_fig(path); return path
+def chart_cac_ltv(inputs):
+    r = cohort_run(inputs); months = np.arange(1, r["bands"].shape[0] + 1); cac_lo, cac_hi = inputs["model"]["cac_range"]
+    fig = new_figure(); ax = fig.subplots()
+    ax.fill_between(months, r["bands"][:, 0], r["bands"][:, 4], alpha=0.2, label="P10–P90")
+    ax.fill_between(months, r["bands"][:, 1], r["bands"][:, 3], alpha=0.35, label="P25–P75")
+    ax.plot(months, r["bands"][:, 2], marker="o", markersize=3, label="Median LTV")
+    ax.plot(months, r["mean"], linestyle="--", label="Mean LTV")
+    ax.axhspan(cac_lo, cac_hi, color="red", alpha=0.25, label=f"CAC PKR {cac_lo}–{cac_hi}")
+    ax.set_title("Cumulative LTV vs CAC (Cohort Simulation)"); ax.set_xlabel("Months since acquisition")
+    ax.set_ylabel("Cumulative contribution (PKR)")
+    # CAC payback curve: share of the cohort whose contribution has covered its own CAC by each month
+    ax2 = ax.twinx(); ax2.grid(False)
+    ax2.plot(months, 100 * r["paid_back"], color="black", linewidth=1.2, marker="s", markersize=2.5, label="CAC recovered (right)")
+    ax2.set_ylim(0, 105); ax2.set_ylabel("CAC recovered (% of customers)")
+    handles, labels = ax.get_legend_handles_labels(); extra = ax2.get_legend_handles_labels()
+    ax2.legend(handles + extra[0], labels + extra[1], fontsize="x-small", loc="upper left", bbox_to_anchor=(0, 0.9), ncol=2)
+    return save_fig(fig)
 
-def chart_porter(tmpdir):
+def chart_porter():
     metrics = ["New Entrants", "Supplier Power", "Buyer Power", "Substitutes", "Rivalry"]
     scores = [3, 4, 5, 3, 5]
     angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
     scores += scores[:1]; angles += angles[:1]
-    fig = plt.figure(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+    fig = new_figure()
     ax = fig.add_subplot(111, polar=True)
     ax.plot(angles, scores, "o-", linewidth=2); ax.fill(angles, scores, alpha=0.25)
     ax.set_thetagrids(np.degrees(angles[:-1]), metrics)
     ax.set_title("Porter’s Five Forces — Thrifted Footwear (Pakistan)")
-    path = os.path.join(tmpdir, "fig_porter.png"); save_fig(path); return path
+    return save_fig(fig)
 
-def chart_break_even(tmpdir, asp, cogs_pct, opex_fix):
+def chart_break_even(asp, cogs_pct, opex_fix):
     units = np.arange(0, 200, 5)
     contribution = asp * (1 - cogs_pct)
     profit = units * contribution - opex_fix
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+    fig = new_figure(); ax = fig.subplots()
     ax.plot(units, profit, label="Profit (PKR)")
     ax.axhline(0, color="red", linestyle="--", label="Break-even")
     ax.set_xlabel("Units (pairs)"); ax.set_ylabel("Profit (PKR)")
     ax.set_title("Break-even Analysis"); ax.legend()
-    path = os.path.join(tmpdir, "fig_break_even.png"); save_fig(path); return path
+    return save_fig(fig)
 
-def chart_courier_costs(tmpdir, city_costs):
+def chart_courier_costs(city_costs):
     cities = list(city_costs.keys())
     lows = [city_costs[c][0] for c in cities]
     highs = [city_costs[c][1] for c in cities]
     x = np.arange(len(cities))
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+    fig = new_figure(); ax = fig.subplots()
     ax.bar(x - 0.15, lows, width=0.3, label="Low")
     ax.bar(x + 0.15, highs, width=0.3, label="High")
     ax.set_xticks(x); ax.set_xticklabels(cities, rotation=15)
     ax.set_ylabel("Courier Cost (PKR)")
     ax.set_title("Average Courier Costs by City (Assumed)")
     ax.legend()
-    path = os.path.join(tmpdir, "fig_courier_costs.png"); save_fig(path); return path
+    return save_fig(fig)
 
-def chart_funnel(tmpdir):
-    stages = ["Reach", "DMs", "Orders", "Repeat"]; values = [10000, 1500, 300, 100]
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+def chart_funnel(funnel):
+    stages = list(funnel); values = list(funnel.values())
+    fig = new_figure(); ax = fig.subplots()
     ax.bar(stages, values, color=["#4c72b0", "#55a868", "#c44e52", "#8172b3"])
     ax.set_title("Sales Funnel (Illustrative)"); ax.set_ylabel("Count")
-    path = os.path.join(tmpdir, "fig_funnel.png"); save_fig(path); return path
+    return save_fig(fig)
 
-def chart_pnl_trends(tmpdir, monthly_pairs, asp, cogs_pct, opex_pct):
+def chart_pnl_trends(monthly_pairs, asp, cogs_pct, opex_pct):
     rev = np.array(monthly_pairs) * asp
     cogs = rev * cogs_pct; gp = rev - cogs; opex = rev * opex_pct; ni = gp - opex
     months = [f"M{i}" for i in range(1, len(monthly_pairs)+1)]
-    df = pd.DataFrame({"Revenue": rev, "Gross Profit": gp, "Net Income": ni}, index=months)
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
-    df.plot(ax=ax, marker="o"); ax.set_title("P&L Trends (6M)"); ax.set_ylabel("PKR")
-    path = os.path.join(tmpdir, "fig_pnl.png"); save_fig(path); return path
+    fig = new_figure(); ax = fig.subplots()
+    for label, values in [("Revenue", rev), ("Gross Profit", gp), ("Net Income", ni)]:
+        ax.plot(months, values, marker="o", label=label)
+    ax.legend(); ax.set_title("P&L Trends (6M)"); ax.set_ylabel("PKR")
+    return save_fig(fig)
 
-def chart_positioning(tmpdir):
+def chart_positioning():
     labels = ["ReStep", "ThriftKicks PK", "SecondSole", "Local IG"]
     price = [3.5, 4.0, 4.5, 3.0]; quality = [4.0, 3.5, 3.5, 3.0]
-    fig, ax = plt.subplots(figsize=(FIG_SCALE, FIG_SCALE * 0.6))
+    fig = new_figure(); ax = fig.subplots()
     ax.scatter(price, quality)
     for i, label in enumerate(labels): ax.annotate(label, (price[i], quality[i]))
     ax.set_xlabel("Price (relative)"); ax.set_ylabel("Perceived Quality (relative)")
     ax.set_title("Competitive Positioning")
-    path = os.path.join(tmpdir, "fig_positioning.png"); save_fig(path); return path
+    return save_fig(fig)
+
+# Scenario engine: the section 13 unit economics evaluated over a whole grid of
+# assumptions at once. Every swept parameter becomes its own array axis and NumPy
+# broadcasting produces the full cross product, so 10^6 combinations cost one pass.
+#   net ASP      = price_scale * (A price * mix_a + B/C blend * (1 - mix_a)) * (1 - return_rate_total)
+#   gross profit = pairs * net ASP * (1 - cogs_pct)
+#   net income   = gross profit - revenue * opex_pct - fixed monthly costs
+#   break-even   = fixed monthly costs / (net ASP * (1 - cogs_pct - opex_pct))
+# This is stricter than the section 13 base case, which ignores returns and opex_pct.
+SCENARIO_PARAMS = ["price_scale", "mix_a", "cogs_pct", "opex_pct", "return_rate_total", "monthly_marketing_budget"]
+SCENARIO_LABELS = {
+    "price_scale": "Price level",
+    "mix_a": "Grade A share",
+    "cogs_pct": "COGS %",
+    "opex_pct": "Variable opex %",
+    "return_rate_total": "Return rate",
+    "monthly_marketing_budget": "Marketing budget",
+}
+
+SCENARIO_KEYS = ("price_bands", "sales_mix", "cogs_pct", "opex_pct", "return_rate_total", "monthly_marketing_budget",
+                 "monthly_utilities_storage", "tools_other", "monthly_pairs_series")  # read by scenario_inputs
+
+def scenario_inputs(a):
+    return {
+        "price_bands": dict(a["price_bands"]), "sales_mix": dict(a["sales_mix"]),
+        "cogs_pct": a["cogs_pct"], "opex_pct": a["opex_pct"], "return_rate_total": a["return_rate_total"],
+        "monthly_marketing_budget": a["monthly_marketing_budget"],
+        "other_fixed": a["monthly_utilities_storage"] + a["tools_other"],
+        "pairs": a["monthly_pairs_series"][-1],
+    }
+
+def scenario_base(inputs):
+    base = {k: inputs[k] for k in SCENARIO_PARAMS if k in inputs}
+    base.update(price_scale=1.0, mix_a=inputs["sales_mix"]["A"])
+    return base
+
+# Default sweep: `points` values per parameter around the current assumptions (points**6 scenarios).
+def scenario_axes(inputs, points=10):
+    b = scenario_base(inputs)
+    return {
+        "price_scale": np.linspace(0.8, 1.2, points),
+        "mix_a": np.linspace(max(b["mix_a"] - 0.15, 0.0), min(b["mix_a"] + 0.15, 1.0), points),
+        "cogs_pct": np.linspace(b["cogs_pct"] - 0.10, b["cogs_pct"] + 0.10, points),
+        "opex_pct": np.linspace(b["opex_pct"] * 0.5, b["opex_pct"] * 1.5, points),
+        "return_rate_total": np.linspace(b["return_rate_total"] * 0.5, b["return_rate_total"] * 2.0, points),
+        "monthly_marketing_budget": np.linspace(b["monthly_marketing_budget"] * 0.5, b["monthly_marketing_budget"] * 2.0, points),
+    }
+
+# Evaluates every combination of `axes` ({param: values}); parameters not swept stay at their base value.
+# Result arrays broadcast to one dimension per swept parameter, in the order of `axes`.
+def run_scenarios(inputs, axes):
+    names = list(axes); base = scenario_base(inputs)
+    def param(name):
+        if name not in axes:
+            return base[name]
+        shape = [1] * len(names); shape[names.index(name)] = -1
+        return np.asarray(axes[name], dtype=float).reshape(shape)
+    p, m = inputs["price_bands"], inputs["sales_mix"]
+    rest = m["B"] + m["C"]  # an all-A mix leaves no B/C split; price the remainder as A
+    rest_price = (p["B"] * m["B"] + p["C"] * m["C"]) / rest if rest else p["A"]
+    mix_a, cogs, opex = param("mix_a"), param("cogs_pct"), param("opex_pct")
+    asp = param("price_scale") * (p["A"] * mix_a + rest_price * (1 - mix_a))
+    net_asp = asp * (1 - param("return_rate_total"))
+    fixed = param("monthly_marketing_budget") + inputs["other_fixed"]
+    revenue = inputs["pairs"] * net_asp
+    gross_profit = revenue * (1 - cogs)
+    net_income = gross_profit - revenue * opex - fixed
+    contribution = net_asp * (1 - cogs - opex)
+    with np.errstate(divide="ignore"):
+        break_even = np.where(contribution > 0, fixed / contribution, np.inf)
+    shape = np.broadcast_shapes(*(np.shape(x) for x in (revenue, net_income, break_even)))
+    return {k: np.broadcast_to(v, shape) for k, v in
+            {"asp": asp, "revenue": revenue, "gross_profit": gross_profit, "net_income": net_income, "break_even": break_even}.items()}
+
+# One-at-a-time swing of net income: each parameter at the ends of its axis, the rest at base.
+def sensitivity(inputs, axes, metric="net_income"):
+    base = float(run_scenarios(inputs, {})[metric])
+    swings = {name: tuple(run_scenarios(inputs, {name: [vals[0], vals[-1]]})[metric]) for name, vals in axes.items()}
+    return base, swings
+
+def sweep_summary(inputs, points=10):
+    r = run_scenarios(inputs, scenario_axes(inputs, points))
+    ni, be = r["net_income"], r["break_even"]
+    finite = be[np.isfinite(be)]
+    return {
+        "scenarios": ni.size,
+        "profitable_share": float((ni > 0).mean()),
+        "net_income_p10_p50_p90": np.percentile(ni, [10, 50, 90]),
+        "break_even_p10_p50_p90": np.percentile(finite, [10, 50, 90]) if finite.size else np.full(3, np.inf),
+        "base": {k: float(v) for k, v in run_scenarios(inputs, {}).items()},
+    }
+
+def chart_tornado(inputs, points):
+    base, swings = sensitivity(inputs, scenario_axes(inputs, points))
+    order = sorted(swings, key=lambda k: abs(swings[k][1] - swings[k][0]))
+    y = np.arange(len(order))
+    lows = np.array([swings[k][0] for k in order]) - base; highs = np.array([swings[k][1] for k in order]) - base
+    fig = new_figure(); ax = fig.subplots()
+    ax.barh(y, lows, left=base, label="Low end of range"); ax.barh(y, highs, left=base, label="High end of range")
+    ax.axvline(base, color="black", linewidth=1)
+    ax.set_yticks(y); ax.set_yticklabels([SCENARIO_LABELS[k] for k in order])
+    ax.set_xlabel("Net income (PKR/month)")
+    ax.set_title("Sensitivity of Net Income (Tornado)")
+    fig.legend(*ax.get_legend_handles_labels(), loc="outside lower center", ncol=2, fontsize="small")  # constrained layout reserves room for it
+    return save_fig(fig)
+
+def chart_scenario_heatmap(inputs, points):
+    axes = scenario_axes(inputs, points)
+    prices = np.linspace(axes["price_scale"][0], axes["price_scale"][-1], 60)
+    cogs = np.linspace(axes["cogs_pct"][0], axes["cogs_pct"][-1], 60)
+    be = run_scenarios(inputs, {"cogs_pct": cogs, "price_scale": prices})["break_even"]
+    fig = new_figure(); ax = fig.subplots()
+    im = ax.pcolormesh(prices, cogs * 100, be, shading="nearest", cmap="viridis_r")
+    ax.contour(prices, cogs * 100, be, levels=[inputs["pairs"]], colors="red", linestyles="--")
+    fig.colorbar(im, ax=ax, label="Break-even (pairs/month)")
+    ax.set_xlabel("Price level (x current bands)"); ax.set_ylabel("COGS (%)")
+    ax.set_title("Break-even Pairs by Price and COGS"); ax.grid(False)
+    return save_fig(fig)
+
+# Cohort engine: simulates acquired customers month by month on flat NumPy arrays (one slot per
+# customer) instead of per-customer objects. Each customer gets a gamma-distributed repeat-purchase
+# rate (heterogeneity: many one-off buyers, a loyal core), Poisson orders while active, a monthly
+# churn hazard, and per-order refunds / exchanges. Every order's grade is drawn from the sales mix.
+# Contribution per kept order is price * (1 - cogs_pct) as in section 13; exchanges cost two courier
+# legs plus packaging, refunds one courier leg. CAC is drawn per customer from cac_range.
+COHORT_KEYS = ("city_courier_costs", "cohort_model", "price_bands", "sales_mix", "cogs_pct", "packaging_cost_per_pair")  # read by cohort_inputs
+
+def cohort_inputs(a):
+    costs = a["city_courier_costs"].values()
+    return {
+        "model": dict(a["cohort_model"]), "price_bands": dict(a["price_bands"]), "sales_mix": dict(a["sales_mix"]),
+        "cogs_pct": a["cogs_pct"], "packaging_cost": a["packaging_cost_per_pair"],
+        "courier_cost": sum((lo + hi) / 2 for lo, hi in costs) / len(costs),
+    }
+
+def simulate_cohorts(inputs):
+    m = inputs["model"]; rng = np.random.default_rng(m["seed"])
+    n, horizon = m["customers"], m["horizon_months"]
+    prices = np.array(list(inputs["price_bands"].values()), dtype=float)
+    mix = np.array([inputs["sales_mix"][g] for g in inputs["price_bands"]], dtype=float); mix /= mix.sum()
+    margin = prices * (1 - inputs["cogs_pct"])
+    exchange_cost = 2 * inputs["courier_cost"] + inputs["packaging_cost"]; refund_cost = inputs["courier_cost"]
+    p_refund = m["refund_rate"]; p_exchange = m["exchange_rate"] / (1 - p_refund)
+    shape = m["frequency_shape"]
+    rate = rng.gamma(shape, (m["purchases_per_year"] - 1) / 12 / shape, n)
+    cac = rng.uniform(*m["cac_range"], n)
+    active = np.ones(n, dtype=bool); ltv = np.zeros(n); payback = np.full(n, -1)
+    first_year = np.zeros(n, dtype=np.int64); repeat_6m = np.zeros(n, dtype=bool)
+    bands = np.empty((horizon, 5)); mean = np.empty(horizon); paid_back = np.empty(horizon)
+    orders_total = returns_total = 0
+    for month in range(horizon):
+        orders = np.ones(n, dtype=np.int64) if month == 0 else rng.poisson(rate) * active
+        refunds = rng.binomial(orders, p_refund); exchanges = rng.binomial(orders - refunds, p_exchange)
+        kept = rng.multinomial(orders - refunds, mix)
+        ltv += kept @ margin - exchanges * exchange_cost - refunds * refund_cost
+        orders_total += orders.sum(); returns_total += refunds.sum() + exchanges.sum()
+        if month < 12:
+            first_year += orders
+        if 1 <= month <= 6:
+            repeat_6m |= orders > 0
+        payback[(payback < 0) & (ltv >= cac)] = month
+        bands[month] = np.percentile(ltv, [10, 25, 50, 75, 90]); mean[month] = ltv.mean()
+        paid_back[month] = (payback >= 0).mean()
+        active &= rng.random(n) >= m["monthly_churn"]
+    # Only what the charts and section 13 use is kept (and stored): no per-customer arrays.
+    counts, edges = np.histogram(ltv, bins=60, range=(min(ltv.min(), 0), np.percentile(ltv, 99)))
+    paid = payback[payback >= 0]
+    return {
+        "bands": bands, "mean": mean, "paid_back": paid_back, "ltv_hist": counts, "ltv_edges": edges,
+        "ltv_p10_p50_p90": np.percentile(ltv, [10, 50, 90]), "ltv_mean": ltv.mean(), "cac_mean": cac.mean(), "customers": n,
+        "payback_median_month": float(np.median(paid)) if paid.size else np.nan,
+        "purchases_first_year": first_year.mean(), "repeat_6m": repeat_6m.mean(), "return_rate": returns_total / orders_total,
+    }
+
+# The ES-2 chart, the LTV chart and the section 13 text share one run per process. With DERIVED_CACHE_DIR
+# set (the figure cache, from --cache-dir), runs are also stored there as <key>.npz, keyed like a chart by
+# the inputs and simulate_cohorts' code, so later builds and render workers load instead of simulating.
+_last_cohort_run = (None, None)
+
+def cohort_run(inputs):
+    global _last_cohort_run
+    key = repr(inputs)
+    if _last_cohort_run[0] != key:
+        _last_cohort_run = (key, _stored_cohort_run(inputs))
+    return _last_cohort_run[1]
+
+def _stored_cohort_run(inputs):
+    if not DERIVED_CACHE_DIR:
+        return simulate_cohorts(inputs)
+    h = hashlib.sha256(repr(inputs).encode()); h.update(json.dumps(code_deps(simulate_cohorts), sort_keys=True).encode())
+    path = os.path.join(DERIVED_CACHE_DIR, f"cohort-{h.hexdigest()}.npz")
+    data = _read_cached(path)
+    if data is not None:
+        with np.load(io.BytesIO(data)) as f:
+            return {k: v[()] if v.ndim == 0 else v for k, v in f.items()}
+    with span("simulate_cohorts", "cohort", customers=inputs["model"]["customers"]):
+        r = simulate_cohorts(inputs)
+    buf = io.BytesIO(); np.savez(buf, **r); _write_cached(path, buf.getvalue())
+    return r
+
+def cohort_summary(inputs):
+    r = cohort_run(inputs); paid = r["payback_median_month"]
+    return {
+        "customers": int(r["customers"]), "horizon": r["bands"].shape[0],
+        "purchases_first_year": r["purchases_first_year"], "repeat_6m": r["repeat_6m"], "return_rate": r["return_rate"],
+        "ltv_mean": r["ltv_mean"], "ltv_p10_p50_p90": r["ltv_p10_p50_p90"],
+        "ltv_to_cac": r["ltv_mean"] / r["cac_mean"], "paid_back_share": r["paid_back"][-1],
+        "payback_median_month": None if np.isnan(paid) else float(paid),
+    }
+
+def chart_ltv_distribution(inputs):
+    r = cohort_run(inputs); edges = r["ltv_edges"]
+    fig = new_figure(); ax = fig.subplots()
+    ax.hist(edges[:-1], bins=edges, weights=r["ltv_hist"], color="#4878D0")
+    for q, style in zip(r["ltv_p10_p50_p90"], [":", "-", ":"]):
+        ax.axvline(q, color="black", linestyle=style, linewidth=1)
+    ax.axvline(r["cac_mean"], color="red", linestyle="--", label=f"Mean CAC (PKR {r['cac_mean']:.0f})")
+    ax.xaxis.set_major_formatter(mpl.ticker.FuncFormatter(lambda v, _: f"{v / 1000:.0f}k"))
+    ax.set_xlabel(f"{r['bands'].shape[0]}-month contribution per customer (PKR)"); ax.set_ylabel("Customers")
+    ax.set_title("Simulated LTV Distribution (P10 / P50 / P90)"); ax.legend()
+    return save_fig(fig)
+
+FIXED_COST_KEYS = ("monthly_marketing_budget", "monthly_utilities_storage", "tools_other")
+
+def fixed_monthly_costs(a):
+    return a["monthly_marketing_budget"] + a["monthly_utilities_storage"] + a["tools_other"]
+
+# Every figure in the report as (figure id, chart function, arguments taken from `a`), or only those in fig_ids.
+def collect_chart_jobs(a, fig_ids=None):
+    jobs = [
+        ("fig_revenue_capacity", chart_monthly_revenue_and_capacity, (a["monthly_pairs_series"], a["blended_asp"], a["capacity_pairs"])),
+        ("fig_cac_ltv", chart_cac_ltv, (cohort_inputs(a),)),
+        ("fig_ltv_distribution", chart_ltv_distribution, (cohort_inputs(a),)),
+        ("fig_porter", chart_porter, ()),
+        ("fig_positioning", chart_positioning, ()),
+        ("fig_funnel", chart_funnel, (a["funnel"],)),
+        ("fig_courier_costs", chart_courier_costs, (a["city_courier_costs"],)),
+        ("fig_break_even", chart_break_even, (a["blended_asp"], a["cogs_pct"], fixed_monthly_costs(a))),
+        ("fig_pnl", chart_pnl_trends, (a["monthly_pairs_series"], a["blended_asp"], a["cogs_pct"], a["opex_pct"])),
+        ("fig_tornado", chart_tornado, (scenario_inputs(a), SCENARIO_POINTS)),
+        ("fig_scenario_heatmap", chart_scenario_heatmap, (scenario_inputs(a), SCENARIO_POINTS)),
+    ]
+    return jobs if fig_ids is None else [job for job in jobs if job[0] in fig_ids]
+
+# Figures shown again in "15) Visual Exhibits", by figure id.
+EXHIBIT_FIGURES = ["fig_revenue_capacity", "fig_cac_ltv", "fig_porter", "fig_courier_costs", "fig_funnel", "fig_pnl", "fig_break_even", "fig_positioning"]
+
+# Returns (PNG bytes, trace events recorded for this job) so spans from pool workers reach the parent.
+def _render_job(job):
+    fig_id, func, args = job
+    ensure_plotting()
+    mark = len(TRACE_EVENTS)
+    with span(fig_id, "chart", function=func.__name__):
+        data = func(*args)
+    if DERIVED_CACHE_DIR:  # encode for the DOCX here too, so pool workers share that work as well
+        stored_image(data, image_steps(fig_id)[0])
+    events = TRACE_EVENTS[mark:]; del TRACE_EVENTS[mark:]
+    return data, events
+
+# Module settings a rendering process must share with the parent (needed where workers are spawned, not forked).
+def _worker_settings():
+    return {"FAST_START": FAST_START, "FIG_SCALE": FIG_SCALE, "DPI": DPI, "TRACING": TRACING,
+            "IMAGE_FORMAT": IMAGE_FORMAT, "MAX_DOCX_KB": MAX_DOCX_KB, "IMAGE_REPORT": IMAGE_REPORT,
+            "DERIVED_CACHE_DIR": DERIVED_CACHE_DIR}
+
+def _init_worker(settings):
+    globals().update(settings); ensure_plotting()
+
+MIN_TASKS_PER_WORKER = 2  # default sizing: below this a process pool costs more to start than it saves
+
+# Processes to start for this many tasks; <= 1 means run in this process. An explicit workers count is
+# honoured (up to one process per task); workers=None uses one per core, at MIN_TASKS_PER_WORKER each.
+def pool_size(workers, tasks):
+    if workers is not None:
+        return min(workers, tasks)
+    return min(os.cpu_count() or 1, tasks // MIN_TASKS_PER_WORKER)
+
+def _render_uncached(jobs, workers):
+    if not jobs:
+        return []
+    ensure_plotting()
+    workers = pool_size(workers, len(jobs))
+    if workers <= 1:
+        results = [_render_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(_worker_settings(),)) as pool:
+            results = list(pool.map(_render_job, jobs))
+    for _, events in results:
+        TRACE_EVENTS.extend(events)
+    return [data for data, _ in results]
+
+# Read from package metadata so computing cache keys does not import the plotting stack.
+@functools.lru_cache(maxsize=None)
+def _library_versions():
+    versions = {}
+    for dist in ("matplotlib", "seaborn", "numpy", "pillow"):
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = None
+    return versions
+
+@functools.lru_cache(maxsize=None)
+def _source(func):
+    return inspect.getsource(func)
+
+VOLATILE_GLOBALS = {"TRACE_EVENTS", "TRACING", "DERIVED_CACHE_DIR"}  # module state that never changes what gets rendered or written
+
+# Module-level functions reachable from func through global names (transitively, including nested
+# code such as comprehensions) and the UPPER_CASE constants they read.
+@functools.lru_cache(maxsize=None)
+def _code_names(func):
+    g, functions, constants, todo, seen = func.__globals__, {}, set(), [(func.__name__, func)], {func.__name__}
+    while todo:
+        name, f = todo.pop(); functions[name] = _source(f); codes = [inspect.unwrap(f).__code__]
+        while codes:
+            code = codes.pop(); codes.extend(c for c in code.co_consts if inspect.iscode(c))
+            for ref in code.co_names:
+                value = g.get(ref)
+                if ref in seen or ref in VOLATILE_GLOBALS:
+                    continue
+                if inspect.isfunction(value) and value.__module__ == func.__module__:
+                    todo.append((ref, value)); seen.add(ref)
+                elif ref.isupper() and ref in g:
+                    constants.add(ref)
+    return functions, tuple(sorted(constants))
+
+# {name: source or JSON value} for everything func depends on in this module, so an edit to a helper
+# or a constant counts as a change to every chart and section that reaches it.
+def code_deps(func):
+    functions, constants = _code_names(func); deps = dict(functions)
+    for name in constants:
+        try:
+            deps[name] = json.dumps(func.__globals__[name], sort_keys=True)
+        except TypeError:
+            pass
+    return deps
+
+# Content address of a chart: its inputs, the code it runs (see code_deps), figure geometry, style and library versions.
+def chart_cache_key(job):
+    fig_id, func, args = job
+    h = hashlib.sha256()
+    style = SEABORN_WHITEGRID_RC if FAST_START else STYLE
+    h.update(repr((fig_id, args, FIG_SCALE, render_dpi(), style, sorted(_library_versions().items()))).encode())
+    h.update(json.dumps(code_deps(func), sort_keys=True).encode())
+    return h.hexdigest()
+
+# Drops least recently used entries (by mtime, refreshed on every hit) until the cache fits in max_bytes.
+# render_jobs calls it after storing charts; since cohort runs and encoded images are stored outside it,
+# every build (a normal build, each batch chunk, each watch rebuild) also calls it when it finishes.
+def evict_cache(cache_dir, max_bytes):
+    entries = []
+    for e in os.scandir(cache_dir):
+        if not e.name.endswith(".tmp"):
+            st = e.stat(); entries.append((st.st_mtime, st.st_size, e.path))
+    entries.sort(); total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def _read_cached(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    os.utime(path); return data
+
+# Writes under a per-process temporary name and renames, so concurrent builds never read a partial entry.
+def _write_cached(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True); partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+
+# Renders jobs and returns their encoded PNG bytes in job order. Jobs with the same cache key
+# (same chart, same inputs) are rendered only once. workers=None uses every core, or renders serially
+# in this process on a single core or with too few charts to share out; workers <= 1 is always serial.
+# With a cache_dir, figures whose key is already cached are reused and fresh renders are stored there.
+def render_jobs(jobs, workers=None, cache_dir=None, cache_max_mb=CACHE_MAX_MB):
+    with span("cache lookup", "cache", jobs=len(jobs)):
+        keys = [chart_cache_key(job) for job in jobs]
+        images, pending = {}, {}
+        for key, job in zip(keys, jobs):
+            if key in images or key in pending:
+                continue
+            data = _read_cached(os.path.join(cache_dir, key + ".png")) if cache_dir else None
+            if data is not None:
+                images[key] = data
+            else:
+                pending[key] = job
+    with span("render", "render", charts=len(pending), workers=workers):
+        images.update(zip(pending, _render_uncached(list(pending.values()), workers)))
+    if cache_dir and pending:
+        with span("cache store", "cache", charts=len(pending)):
+            for key in pending:
+                _write_cached(os.path.join(cache_dir, key + ".png"), images[key])
+            evict_cache(cache_dir, cache_max_mb * 1024 * 1024)
+    return [images[key] for key in keys]
+
+# Figure registry for one report: {figure id: PNG bytes}.
+def render_charts(jobs, **kwargs):
+    return {job[0]: data for job, data in zip(jobs, render_jobs(jobs, **kwargs))}
+
+# Batch mode: one interpreter builds many plan variants. A manifest is a JSON list (or {"variants": [...]})
+# of {"name": ..., "output": "out/plan.docx", "overrides": {...}}; overrides are deep-merged into
+# `assumptions`. The manifest is processed BATCH_CHUNK variants at a time: charts are rendered once per
+# distinct cache key within the chunk (later chunks reuse them through the disk cache), then the
+# documents are built by worker processes forked from a preloaded server (warm imports) and recycled
+# every BATCH_TASKS_PER_CHILD variants. Only one chunk's PNGs are held at once, so peak RSS stays flat
+# as the manifest grows.
+BATCH_CHUNK = 8
+BATCH_TASKS_PER_CHILD = 25
+
+def merge_overrides(base, overrides):
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_overrides(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+def variant_assumptions(overrides):
+    return derive_assumptions(merge_overrides(assumptions, overrides))
+
+def load_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    variants = manifest["variants"] if isinstance(manifest, dict) else manifest
+    return [{"name": v.get("name") or os.path.splitext(os.path.basename(v["output"]))[0],
+             "output": v["output"], "overrides": v.get("overrides", {})} for v in variants]
+
+# High-water resident set size of this process in MB (None where `resource` is unavailable).
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _build_variant(variant, a, figs, settings, sections=None):
+    globals().update(settings)
+    start = time.perf_counter(); mark = len(TRACE_EVENTS)
+    os.makedirs(os.path.dirname(os.path.abspath(variant["output"])), exist_ok=True)
+    with span(f"variant {variant['name']}", "stage"):
+        build_document(a, figs, variant["output"], sections=sections)
+    events = TRACE_EVENTS[mark:]; del TRACE_EVENTS[mark:]
+    return {"name": variant["name"], "output": variant["output"], "seconds": round(time.perf_counter() - start, 3),
+            "peak_rss_mb": peak_rss_mb(), "pid": os.getpid()}, events
+
+def _warm_context():
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    ctx = mp.get_context("forkserver"); ctx.set_forkserver_preload([__name__])
+    return ctx
+
+def run_batch(manifest_path, workers=None, cache_dir=None, cache_max_mb=CACHE_MAX_MB, report_path=None, sections=None):
+    start = time.perf_counter()
+    variants = load_manifest(manifest_path); keys, results = set(), []
+    def report(outcome):
+        result, events = outcome; TRACE_EVENTS.extend(events)
+        results.append(result); rss = result["peak_rss_mb"]
+        print(f"[{len(results)}/{len(variants)}] {result['name']}: {result['seconds']:.2f}s, peak RSS "
+              f"{'n/a' if rss is None else f'{rss:.0f} MB'} -> {result['output']}")
+    pool = None; procs = pool_size(workers, len(variants))
+    if procs > 1:
+        pool = ProcessPoolExecutor(max_workers=procs, mp_context=_warm_context(), max_tasks_per_child=BATCH_TASKS_PER_CHILD)
+    try:
+        for i in range(0, len(variants), BATCH_CHUNK):
+            chunk = variants[i:i + BATCH_CHUNK]
+            prepared = [variant_assumptions(v["overrides"]) for v in chunk]
+            job_lists = [collect_chart_jobs(a, section_figures(sections)) for a in prepared]
+            all_jobs = [job for jobs in job_lists for job in jobs]; keys.update(map(chart_cache_key, all_jobs))
+            images = iter(render_jobs(all_jobs, workers=workers, cache_dir=cache_dir, cache_max_mb=cache_max_mb))
+            tasks = [(v, a, {job[0]: next(images) for job in jobs}, _worker_settings(), sections)
+                     for v, a, jobs in zip(chunk, prepared, job_lists)]
+            print(f"Charts: {len(keys)} distinct for {i + len(chunk)}/{len(variants)} variants ({time.perf_counter() - start:.2f}s)")
+            if pool is None:
+                for task in tasks:
+                    report(_build_variant(*task))
+            else:
+                for fut in as_completed([pool.submit(_build_variant, *task) for task in tasks]):
+                    report(fut.result())
+            del prepared, job_lists, all_jobs, images, tasks
+            if cache_dir:
+                evict_cache(cache_dir, cache_max_mb * 1024 * 1024)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    distinct = len(keys)
+    position = {v["output"]: i for i, v in enumerate(variants)}; results.sort(key=lambda r: position[r["output"]])
+    summary = {"variants": results, "distinct_charts": distinct, "seconds": round(time.perf_counter() - start, 3),
+               "max_peak_rss_mb": max((r["peak_rss_mb"] or 0 for r in results), default=0), "parent_peak_rss_mb": peak_rss_mb()}
+    print(f"Batch: {len(results)} variants in {summary['seconds']:.2f}s; max worker peak RSS {summary['max_peak_rss_mb']:.0f} MB")
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+# Order-log ingestion: streams a CSV or Parquet export in bounded chunks, aggregates each chunk with
+# vectorized group-bys and folds the result into a persisted JSON aggregate, which then fills `assumptions`.
+# Expected columns: order_date, customer_id, city, grade (A/B/C), courier_cost (PKR), status
+# (delivered / exchanged / refunded) and optionally quantity (pairs, default 1). Months already in the
+# aggregate are skipped, so re-running on a growing export only processes new months; pass
+# --orders-rebuild after re-exporting a month that was aggregated while still incomplete.
+# Memory is bounded by the chunk size plus the aggregate (months x cities x courier-cost bins, and one
+# counter per customer for repeat purchases), not by the number of rows.
+ORDER_COLUMNS = ["order_date", "customer_id", "city", "grade", "courier_cost", "status", "quantity"]
+ORDER_STATE = "restep_order_aggregates.json"
+ORDER_CHUNKSIZE = 250_000
+ORDER_MONTHS = 6  # trailing months used for the monthly series, mix, courier ranges and return rate
+COURIER_BIN_PKR = 10
+RETURN_STATUSES = ["exchanged", "refunded"]
+
+def _order_chunks(path, chunksize):
+    import pandas as pd
+    if path.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Reading Parquet order logs requires pyarrow (pip install pyarrow).")
+        source = pq.ParquetFile(path)
+        columns = [c for c in ORDER_COLUMNS if c in source.schema_arrow.names]
+        for batch in source.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=lambda c: c in ORDER_COLUMNS,
+                               dtype={"customer_id": str, "city": str, "grade": str, "status": str})
+
+# Applies `clean` to the distinct values of a column only (dates, cities, grades and statuses repeat heavily).
+def _normalise(column, clean):
+    import pandas as pd
+    codes, uniques = pd.factorize(column)
+    labels = np.append(np.asarray(clean(pd.Index(uniques)), dtype=object), None)
+    return pd.Series(labels[codes], index=column.index)
+
+def _summarise_orders(df, frozen_months):
+    import pandas as pd
+    month = _normalise(df["order_date"], lambda d: pd.to_datetime(d).strftime("%Y-%m"))
+    keep = ~month.isin(frozen_months).to_numpy()
+    df, month = df[keep], month[keep]
+    status = _normalise(df["status"], lambda v: v.str.strip().str.lower())
+    grade = _normalise(df["grade"], lambda v: v.str.strip().str.upper())
+    city = _normalise(df["city"], lambda v: v.str.strip())
+    qty = df["quantity"] if "quantity" in df else pd.Series(1, index=df.index)
+    sold = qty.where(status != "refunded", 0)
+    returned = status.isin(RETURN_STATUSES)
+    cost_bin = (df["courier_cost"].dropna() // COURIER_BIN_PKR).astype("int64")
+    return {
+        "orders": month.value_counts(),
+        "pairs": sold.groupby(month).sum(),
+        "grades": sold.groupby([month, grade]).sum(),
+        "returns": status[returned].groupby([month[returned], status[returned]]).size(),
+        "courier_bins": cost_bin.groupby([month[cost_bin.index], city[cost_bin.index], cost_bin]).size(),
+        "customers": (month + " " + df["customer_id"].astype(str)).value_counts(sort=False),  # flat key: no MultiIndex unions
+    }, int((~keep).sum())
+
+# Folds one chunk's partial counts into the running totals with a hash group-by (no index sort/align).
+def _accumulate(total, part):
+    import pandas as pd
+    if total is None:
+        return part
+    merged = pd.concat([total, part]).rename(None)  # a named series costs a lookup of its name in the index
+    return merged.groupby(level=list(range(merged.index.nlevels)), sort=False).sum()
+
+def _nest(series, state_months, field):
+    for index, value in series.items():
+        node = state_months.setdefault(index[0], {}).setdefault(field, {})
+        for key in index[1:-1]:
+            node = node.setdefault(key, {})
+        node[str(index[-1])] = node.get(str(index[-1]), 0) + int(value)
+
+# Stored months are skipped on the next run, except the latest: it may have been exported while
+# still incomplete, so it is re-aggregated (and replaced) every time. Per-customer order counts are
+# kept only for the trailing `months`, which is all the repeat-customer count looks at.
+def ingest_orders(path, state_path=ORDER_STATE, chunksize=ORDER_CHUNKSIZE, rebuild=False, months=ORDER_MONTHS):
+    state = {"months": {}}
+    if not rebuild and os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    state.pop("customers", None)  # all-time counts written by older versions
+    frozen = sorted(state["months"])[:-1]
+    totals, rows, skipped, chunks = {}, 0, 0, 0
+    with span("ingest orders", "ingest", path=path):
+        for df in _order_chunks(path, chunksize):
+            summary, skip = _summarise_orders(df, frozen)
+            for field, series in summary.items():
+                totals[field] = _accumulate(totals.get(field), series)
+            rows += len(df); skipped += skip; chunks += 1
+    new_months = {}
+    for field in ("orders", "pairs"):
+        for m, value in totals.get(field, {}).items():
+            new_months.setdefault(m, {})[field] = int(value)
+    for field in ("grades", "returns", "courier_bins"):
+        if field in totals:
+            _nest(totals[field], new_months, field)
+    window = set(sorted(set(state["months"]) | set(new_months))[-months:])
+    for key, n in totals.get("customers", {}).items():
+        m, cid = key.split(" ", 1)
+        if m in window:
+            new_months[m].setdefault("customers", {})[cid] = int(n)
+    state["months"].update(new_months)
+    for m in set(state["months"]) - window:
+        state["months"][m].pop("customers", None)
+    with open(state_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(state))
+    print(f"Orders: {rows:,} rows in {chunks} chunks; {len(new_months)} month(s) aggregated, "
+          f"{skipped:,} rows in already aggregated months skipped -> {state_path}")
+    return state
+
+def _bin_quantile(hist, q):
+    bins = sorted((int(b), n) for b, n in hist.items()); target = q * sum(n for _, n in bins); seen = 0
+    for b, n in bins:
+        seen += n
+        if seen >= target:
+            return b * COURIER_BIN_PKR
+    return bins[-1][0] * COURIER_BIN_PKR
+
+# Replaces the hand-typed metrics with the trailing `months` of the aggregate. Updates `a` in place.
+def apply_order_aggregates(a, state, months=ORDER_MONTHS):
+    recent = [state["months"][m] for m in sorted(state["months"])[-months:]]
+    if not recent:
+        return a
+    a["monthly_pairs_series"] = [m.get("pairs", 0) for m in recent]
+    grades = {g: sum(m.get("grades", {}).get(g, 0) for m in recent) for g in ("A", "B", "C")}
+    if sum(grades.values()):
+        a["sales_mix"] = {g: n / sum(grades.values()) for g, n in grades.items()}
+    hists = {}
+    for m in recent:
+        for city, hist in m.get("courier_bins", {}).items():
+            merged = hists.setdefault(city, {})
+            for b, n in hist.items():
+                merged[b] = merged.get(b, 0) + n
+    if hists:
+        a["city_courier_costs"] = {city: (_bin_quantile(h, 0.1), _bin_quantile(h, 0.9) + COURIER_BIN_PKR)
+                                   for city, h in sorted(hists.items())}
+    orders = sum(m.get("orders", 0) for m in recent)
+    if orders:
+        a["return_rate_total"] = sum(sum(m.get("returns", {}).values()) for m in recent) / orders
+        customers = {}
+        for m in recent:
+            for cid, n in m.get("customers", {}).items():
+                customers[cid] = customers.get(cid, 0) + n
+        a["order_counts"] = {"months": len(recent), "orders": orders,
+                             "repeat_customers": sum(1 for n in customers.values() if n >= 2)}
+    return derive_assumptions(a)
+
+# Report outline: build_outline records headings, paragraphs, captions, figures and page breaks as
+# tuples, so the layout can be estimated (and tuned) before any chart is rendered or DOCX written.
+# Exhibit figures and their captions carry the figure id so they can be left out at write time.
+def add_figure(doc, fig_id, exhibit=False):
+    doc.append(("figure", fig_id, exhibit))
 
 def add_heading(doc, text, level=1):
-    h = doc.add_heading(text, level=level); h.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    doc.append(("heading", text, level))
 
 def add_para(doc, text, bold=False, italic=False):
+    doc.append(("para", text, bold, italic))
+
+def add_caption(doc, text, exhibit=None):
+    doc.append(("caption", text, exhibit))
+
+def add_page_break(doc):
+    doc.append(("page_break",))
+
+def visible_ops(outline, exhibits=EXHIBIT_FIGURES):
+    for op in outline:
+        exhibit = op[0] in ("figure", "caption") and op[2]
+        if not exhibit or (op[1] if op[0] == "figure" else exhibit) in exhibits:
+            yield op
+
+def _docx_figure(doc, figs, fig_id, exhibit):
+    with span("add_picture", "docx", figure=fig_id):
+        doc.add_picture(io.BytesIO(figs[fig_id]), width=Inches(display_width()))
+
+def _docx_heading(doc, figs, text, level):
+    h = doc.add_heading(text, level=level); h.alignment = WD_ALIGN_PARAGRAPH.LEFT
+
+def _docx_para(doc, figs, text, bold, italic):
     p = doc.add_paragraph(); run = p.add_run(text)
-    run.bold = bold; run.italic = italic; p.paragraph_format.space_after = Pt(6); return p
+    run.bold = bold; run.italic = italic; p.paragraph_format.space_after = Pt(6)
 
-def add_caption(doc, text):
+def _docx_caption(doc, figs, text, exhibit):
     p = doc.add_paragraph(); run = p.add_run(text)
     run.italic = True; run.font.size = Pt(9); p.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-def main():
-    tmpdir = tempfile.mkdtemp()
+DOCX_WRITERS = {"figure": _docx_figure, "heading": _docx_heading, "para": _docx_para, "caption": _docx_caption,
+                "page_break": lambda doc, figs: doc.add_page_break()}
+
+# Image encoding: charts are rendered and cached as full-colour PNG, then encoded for the DOCX. Each
+# format is a list of steps (format, colours or JPEG quality, pixel scale), best first; figures start
+# at the first step of their format and the size budget moves them down. Palette PNG keeps chart
+# lines and text sharp at a third of the bytes; JPEG suits photographic content. Vector figures
+# (SVG/EMF) are not an option because python-docx only embeds raster images.
+IMAGE_FORMAT = "png8"
+IMAGE_FORMATS = {}  # figure id -> format, for figures that need something other than IMAGE_FORMAT
+IMAGE_STEPS = {
+    "png": [("png", None, 1.0), ("png8", 256, 1.0), ("png8", 64, 1.0), ("png8", 64, 0.8), ("png8", 32, 0.65)],
+    "png8": [("png8", 256, 1.0), ("png8", 64, 1.0), ("png8", 64, 0.8), ("png8", 32, 0.65)],
+    "jpeg": [("jpeg", 90, 1.0), ("jpeg", 75, 1.0), ("jpeg", 75, 0.8), ("jpeg", 60, 0.65)],
+}
+MAX_DOCX_KB = 400  # 0 or None: no budget
+IMAGE_REPORT = False
+
+# Encoded images are cached in memory and, with DERIVED_CACHE_DIR, on disk keyed by the rendered PNG, the
+# step and the encoder, so a rebuild with cached figures re-encodes nothing.
+def stored_image(png, step):
+    if step == ("png", None, 1.0) or not DERIVED_CACHE_DIR:
+        return encode_image(png, step)
+    h = hashlib.sha256(png); h.update(repr((step, _library_versions()["pillow"])).encode())
+    h.update(json.dumps(code_deps(encode_image.__wrapped__), sort_keys=True).encode())
+    path = os.path.join(DERIVED_CACHE_DIR, h.hexdigest() + (".jpg" if step[0] == "jpeg" else ".png"))
+    data = _read_cached(path)
+    if data is None:
+        data = encode_image(png, step); _write_cached(path, data)
+    return data
+
+@functools.lru_cache(maxsize=128)
+def encode_image(png, step):
+    fmt, level, scale = step
+    if step == ("png", None, 1.0):
+        return png
+    from PIL import Image
+    img = Image.open(io.BytesIO(png)).convert("RGB"); buf = io.BytesIO()
+    if scale != 1.0:
+        img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+    if fmt == "jpeg":
+        img.save(buf, "JPEG", quality=level, optimize=True)
+    else:
+        img.quantize(colors=level, dither=Image.Dither.NONE).save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+def image_steps(fig_id):
+    return IMAGE_STEPS[IMAGE_FORMATS.get(fig_id, IMAGE_FORMAT)]
+
+def image_report(figs, images, steps):
+    from PIL import Image
+    lines = []
+    for fig_id, png in figs.items():
+        fmt, level, scale = image_steps(fig_id)[steps[fig_id]]; width, height = Image.open(io.BytesIO(images[fig_id])).size
+        label = fmt + ("" if level is None else f"/{level}") + ("" if scale == 1.0 else f" @{scale:.0%}")
+        lines.append(f"  {fig_id:<22} {label:<16} {width}x{height:<5} {len(images[fig_id]) / 1024:7.1f} KB  (rendered {len(png) / 1024:.1f} KB)")
+    return "\n".join(lines)
+
+def _docx_bytes(ops, images):
     doc = Document()
+    for op, *args in ops:
+        DOCX_WRITERS[op](doc, images, *args)
+    buf = io.BytesIO()
+    with span("doc.save", "docx"):
+        doc.save(buf)
+    return buf.getvalue()
+
+# Encodes every figure at its first step, then, while the DOCX is over MAX_DOCX_KB, moves the largest
+# image that has a smaller step to it. The rest of the DOCX (text, styles) is measured from the first
+# write, so each step costs one re-encode rather than a rebuild. Exits with the per-image report if
+# the smallest steps still do not fit.
+def fit_images(ops, figs):
+    budget = MAX_DOCX_KB * 1024 if MAX_DOCX_KB else None; steps = dict.fromkeys(figs, 0); other = None
+    while True:
+        images = {fig_id: stored_image(png, image_steps(fig_id)[steps[fig_id]]) for fig_id, png in figs.items()}
+        total = sum(map(len, images.values()))
+        if other is None or other + total <= budget:
+            data = _docx_bytes(ops, images); other = len(data) - total
+            if budget is None or len(data) <= budget:
+                return data, images, steps
+        left = [fig_id for fig_id in figs if steps[fig_id] + 1 < len(image_steps(fig_id))]
+        if not left:
+            print(image_report(figs, images, steps))
+            sys.exit(f"DOCX would be ~{(other + total) / 1024:.0f} KB with the smallest image settings, over the {MAX_DOCX_KB} KB budget")
+        steps[max(left, key=lambda fig_id: len(images[fig_id]))] += 1
+
+def write_docx(outline, figs, output=OUTPUT_DOCX, exhibits=EXHIBIT_FIGURES):
+    ops = list(visible_ops(outline, exhibits))
+    used = {op[1]: figs[op[1]] for op in ops if op[0] == "figure"}
+    with span("encode images", "docx", figures=len(used)):
+        data, images, steps = fit_images(ops, used)
+    with open(output, "wb") as f:
+        f.write(data)
+    if IMAGE_REPORT or any(steps.values()):
+        print(image_report(used, images, steps))
+    print(f"Images: {len(used)} figures, {sum(map(len, used.values())) / 1024:.0f} KB rendered -> "
+          f"{sum(map(len, images.values())) / 1024:.0f} KB embedded; DOCX {len(data) / 1024:.0f} KB"
+          + (f" (budget {MAX_DOCX_KB} KB)" if MAX_DOCX_KB else ""))
+    print(f"Generated: {output}")
+
+# Layout estimate over the outline, in points, using the page and style metrics of python-docx's
+# default template (Letter, 1.25"/1" margins, Calibri 11 pt at 1.15 line spacing). Text wraps at
+# AVG_CHAR_EM of the font size per character; figures are shown FIG_SCALE (at most the text width) wide
+# at FIG_ASPECT and move to the next page when they do not fit. Word's own pagination can differ by a few percent.
+TARGET_PAGES = (45, 55)
+TARGET_VISUAL = (0.30, 0.35)  # figure area / usable page area
+TEXT_WIDTH_IN, TEXT_HEIGHT_IN = 6.0, 9.0
+AVG_CHAR_EM = 0.5
+LINE_HEIGHT_EM = 1.22  # Calibri single spacing
+TEXT_METRICS = {  # font pt, space before, space after, line spacing
+    "title": (26, 0, 15, 1.0), "heading1": (14, 24, 0, 1.15), "heading2": (13, 10, 0, 1.15),
+    "para": (11, 0, 6, 1.15), "caption": (9, 0, 10, 1.15), "normal": (11, 0, 10, 1.15),
+}
+AUTO_TUNE_SCALES = [3.0 + 0.25 * i for i in range(13)]  # up to the 6" text width
+
+def _text_lines(style, text):
+    size, before, after, spacing = TEXT_METRICS[style]
+    chars = int(TEXT_WIDTH_IN * 72 / (size * AVG_CHAR_EM))
+    return max(1, -(-len(text) // chars)), size * LINE_HEIGHT_EM * spacing, before, after
+
+def estimate_layout(outline, fig_scale=None, exhibits=EXHIBIT_FIGURES):
+    fig_scale = FIG_SCALE if fig_scale is None else fig_scale
+    page = TEXT_HEIGHT_IN * 72; fig_w = min(fig_scale, TEXT_WIDTH_IN) * 72; fig_h = fig_w * FIG_ASPECT
+    pages, y, figures, shown, visual = 1, 0.0, 0, 0, 0.0
+    for op, *args in visible_ops(outline, exhibits):
+        if op == "page_break":  # the break's paragraph mark opens the next page as an empty line
+            _, line, _, after = _text_lines("normal", "")
+            pages += 1; y = line + after; continue
+        if op == "figure":
+            h = fig_h + TEXT_METRICS["normal"][2]
+            if y and y + h > page:
+                pages += 1; y = 0.0
+            y += h; figures += 1; shown += args[1]; visual += fig_w * fig_h; continue
+        style = "title" if op == "heading" and args[1] == 0 else f"heading{min(args[1], 2)}" if op == "heading" else op
+        lines, line, before, after = _text_lines(style, args[0])
+        y += before if y else 0  # space before is dropped at the top of a page
+        for _ in range(lines):
+            if y + line > page:
+                pages += 1; y = 0.0
+            y += line
+        y += after
+    return {"pages": pages, "visual_share": visual / (pages * TEXT_WIDTH_IN * 72 * page),
+            "figures": figures, "exhibits_shown": shown, "fig_scale": fig_scale, "exhibits": list(exhibits)}
 
-    # Cover
+# Distance outside a (lo, hi) target, and from its middle, both in units of the range width.
+def _target_miss(value, target):
+    lo, hi = target
+    return max(lo - value, value - hi, 0) / (hi - lo), abs(value - (lo + hi) / 2) / (hi - lo)
+
+# Searches FIG_SCALE and how many of EXHIBIT_FIGURES (in order) to include; returns the estimate that
+# meets both targets, or else the one closest to them, preferring estimates near the middle of each range.
+def auto_tune(outline, scales=AUTO_TUNE_SCALES, exhibits=EXHIBIT_FIGURES):
+    def score(est):
+        (pages_miss, pages_off), (visual_miss, visual_off) = (_target_miss(est["pages"], TARGET_PAGES),
+                                                              _target_miss(est["visual_share"], TARGET_VISUAL))
+        return pages_miss + visual_miss, pages_off + visual_off
+    return min((estimate_layout(outline, scale, exhibits[:n]) for scale in scales for n in range(len(exhibits) + 1)), key=score)
+
+def layout_report(est):
+    met = TARGET_PAGES[0] <= est["pages"] <= TARGET_PAGES[1] and TARGET_VISUAL[0] <= est["visual_share"] <= TARGET_VISUAL[1]
+    return (f"Layout estimate: ~{est['pages']} pages, {est['visual_share'] * 100:.0f}% visual ({est['figures']} figures at "
+            f"FIG_SCALE {est['fig_scale']:g}, {est['exhibits_shown']} exhibits); target {TARGET_PAGES[0]}–{TARGET_PAGES[1]} pages, "
+            f"{TARGET_VISUAL[0] * 100:.0f}–{TARGET_VISUAL[1] * 100:.0f}% visual{'' if met else ' (not met)'}")
+
+# Watch mode: keeps one process (and the imported libraries) alive, re-executes this script whenever
+# it is saved and rebuilds only what the edit touched. A section is rebuilt when its code (see
+# code_deps, which includes its @section declaration) or an `assumptions` key it declares changed;
+# a figure is re-rendered, in process, when its cache key changed. Everything else is reused from
+# memory and the DOCX is rewritten. Settings given on the command line override the script's own; edits
+# to the others (WATCH_SETTINGS) apply on the next save.
+WATCH_INTERVAL = 0.5  # seconds between checks of the script's mtime
+WATCH_MEMOS = {"_last_cohort_run": "cohort_run"}  # memo -> function; carried across reloads while its code is unchanged
+WATCH_SETTINGS = ("FIG_SCALE", "DPI", "IMAGE_FORMAT", "MAX_DOCX_KB", "IMAGE_REPORT")  # logged when an edit changes them
+
+# Records which top-level keys a section reads, to report reads its @section does not declare.
+class _KeyLog(dict):
+    def __init__(self, data):
+        super().__init__(data); self.used = set()
+
+    def __getitem__(self, key):
+        self.used.add(key); return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.used.add(key); return super().get(key, default)
+
+def load_generator(path):
+    linecache.checkcache(path)  # inspect.getsource must see the saved file, not the previous one
+    spec = importlib.util.spec_from_file_location("restep_watch", path)
+    module = sys.modules[spec.name] = importlib.util.module_from_spec(spec)  # registered so pool workers can unpickle its jobs
+    spec.loader.exec_module(module)
+    return module
+
+def _changed(old, new):
+    return sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+
+# One incremental build with a freshly loaded module m against the previous build's state.
+# Returns (state, reasons), with a reason per rebuilt section or re-rendered figure.
+def watch_rebuild(m, prev, output, cache_dir=None, cache_max_mb=CACHE_MAX_MB, auto=False, keys=None, workers=None):
+    a, reasons = m.assumptions, []
+    old = prev or {"assumptions": {}, "sections": {}, "charts": {}, "memos": {}, "settings": {}}
+    changed, settings = set(_changed(old["assumptions"], a)), {name: getattr(m, name) for name in WATCH_SETTINGS}
+    if prev and settings != old["settings"]:
+        reasons.append(f"settings changed ({', '.join(_changed(old['settings'], settings))})")
+    memos = {memo: m.code_deps(getattr(m, func)) for memo, func in WATCH_MEMOS.items()}
+    for memo, deps in memos.items():
+        if memo in old["memos"] and old["memos"][memo][0] == deps:
+            setattr(m, memo, old["memos"][memo][1])
+
+    sections, outline, order = {}, [], m.outline_keys(keys)
+    for key in order:
+        if key == "toc":
+            m.add_toc(outline, order); continue
+        sec = m.SECTIONS[key]; deps, cached = m.code_deps(sec["build"]), old["sections"].get(key)
+        why = ("new section" if cached is None else
+               f"code changed ({', '.join(_changed(cached['deps'], deps))})" if cached["deps"] != deps else
+               f"assumptions changed ({', '.join(sorted(changed & set(sec['assumptions'])))})" if changed & set(sec["assumptions"]) else None)
+        if why:
+            ops, log = [], _KeyLog(a); m.build_section(ops, key, log)
+            cached = {"deps": deps, "ops": ops}; reasons.append(f"section {key}: {why}")
+            if log.used - set(sec["assumptions"]):
+                print(f"Warning: section {key} reads undeclared assumptions ({', '.join(sorted(log.used - set(sec['assumptions'])))}); "
+                      "add them to its @section or edits to them will not rebuild it")
+        sections[key] = cached; outline.extend(cached["ops"])
+    est = m.auto_tune(outline) if auto else m.estimate_layout(outline); m.FIG_SCALE = est["fig_scale"]
+
+    charts, stale = {}, []
+    for job in m.collect_chart_jobs(a, m.section_figures(keys)):
+        fig_id, func, args = job; key, cached = m.chart_cache_key(job), old["charts"].get(fig_id)
+        if cached and cached["key"] == key:
+            charts[fig_id] = cached; continue
+        deps = m.code_deps(func); stale.append(job)
+        charts[fig_id] = {"key": key, "args": repr(args), "deps": deps}
+        reasons.append(f"figure {fig_id}: " + ("new figure" if cached is None else "inputs changed" if cached["args"] != repr(args) else
+                                               f"code changed ({', '.join(_changed(cached['deps'], deps))})" if cached["deps"] != deps else
+                                               "figure settings changed"))
+    for job, data in zip(stale, m.render_jobs(stale, workers=workers, cache_dir=cache_dir, cache_max_mb=cache_max_mb)):
+        charts[job[0]]["png"] = data
+    m.write_docx(outline, {fig_id: c["png"] for fig_id, c in charts.items()}, output, est["exhibits"])
+    if cache_dir:
+        m.evict_cache(cache_dir, cache_max_mb * 1024 * 1024)
+    print(m.layout_report(est))
+    state = {"assumptions": a, "sections": sections, "charts": charts, "settings": settings,
+             "memos": {memo: (deps, getattr(m, memo)) for memo, deps in memos.items()}}
+    return state, reasons
+
+def watch(output=OUTPUT_DOCX, cache_dir=None, cache_max_mb=CACHE_MAX_MB, orders_state=None, auto=False, keys=None,
+          interval=WATCH_INTERVAL, workers=None, overrides=None):
+    path = os.path.abspath(__file__); state = mtime = None
+    settings = dict(overrides or {}, TRACING=False, DERIVED_CACHE_DIR=DERIVED_CACHE_DIR)  # the script's own values apply otherwise
+    ensure_plotting()  # the first build may come entirely from the cache; import now rather than on the first edit
+    print(f"Watching {os.path.basename(path)}; rebuilding {output} on save (Ctrl+C to stop)")
+    try:
+        while True:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except FileNotFoundError:  # editors that save by rename
+                current = mtime
+            if current != mtime:
+                mtime = current; start = time.perf_counter()
+                try:
+                    m = load_generator(path); m.__dict__.update(settings)
+                    if orders_state:
+                        m.apply_order_aggregates(m.assumptions, orders_state)
+                    first = state is None
+                    state, reasons = watch_rebuild(m, state, output, cache_dir, cache_max_mb, auto, keys, workers)
+                except Exception:
+                    traceback.print_exc(); print("Build failed; keeping the last document until the next save")
+                else:
+                    stamp = time.strftime("%H:%M:%S"); took = time.perf_counter() - start
+                    if first:
+                        print(f"[{stamp}] initial build: {len(state['sections'])} sections, {len(state['charts'])} figures in {took:.2f}s")
+                    else:
+                        for reason in reasons:
+                            print(f"[{stamp}]   {reason}")
+                        print(f"[{stamp}] rebuilt {sum(r.startswith('section') for r in reasons)}/{len(state['sections'])} sections, "
+                              f"{sum(r.startswith('figure') for r in reasons)}/{len(state['charts'])} figures in {took:.2f}s")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Watch stopped")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the ReStep Footwear business plan DOCX.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="chart rendering processes (default: all cores, serial for a single core or few charts; 0 or 1 renders serially)")
+    parser.add_argument("--no-cache", action="store_true", help="re-render every figure and leave the figure cache untouched")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"figure cache location (default: {CACHE_DIR})")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_MB, help="evict least recently used figures beyond this size")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="style charts with plain matplotlib rcParams instead of importing seaborn")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report where import time goes (for the selected style mode) and exit")
+    parser.add_argument("--fig-scale", type=float, help=f"figure width in inches (default: {FIG_SCALE})")
+    parser.add_argument("--dpi", type=int,
+                        help=f"figure resolution (default: {PRINT_PPI} pixels per displayed inch)")
+    parser.add_argument("--image-format", choices=sorted(IMAGE_STEPS),
+                        help=f"encoding for figures without an IMAGE_FORMATS entry (default: {IMAGE_FORMAT})")
+    parser.add_argument("--max-docx-kb", type=int,
+                        help=f"DOCX size budget; larger images are encoded smaller until it fits (default: {MAX_DOCX_KB}, 0: no limit)")
+    parser.add_argument("--image-report", action="store_true", help="print the encoding, pixel size and bytes of every embedded image")
+    parser.add_argument("--estimate", action="store_true",
+                        help="print the estimated page count and visual share and exit without rendering or writing")
+    parser.add_argument("--auto-tune", action="store_true",
+                        help="pick FIG_SCALE and the exhibits to include from the layout estimate before building")
+    parser.add_argument("--trace", metavar="PATH", help="write per-stage timings as a Chrome trace-event JSON file")
+    parser.add_argument("--orders", metavar="PATH", help="CSV or Parquet order log to aggregate into the report's metrics")
+    parser.add_argument("--orders-state", help=f"persisted order aggregate (default: {ORDER_STATE}); "
+                        "given without --orders, builds from the stored aggregate without reading a log")
+    parser.add_argument("--orders-chunksize", type=int, default=ORDER_CHUNKSIZE, help="rows read per chunk")
+    parser.add_argument("--orders-rebuild", action="store_true", help="discard the persisted aggregate and re-read every month")
+    parser.add_argument("--sections", metavar="KEYS",
+                        help="comma-separated sections to build, e.g. exec,financials (default: all); the cover and "
+                        f"table of contents are always included. Keys: {', '.join(k for k in SECTIONS if SECTIONS[k]['toc'])}")
+    parser.add_argument("--output", default=OUTPUT_DOCX, help=f"DOCX path (default: {OUTPUT_DOCX})")
+    parser.add_argument("--watch", action="store_true",
+                        help="stay running and rebuild the changed sections and figures whenever this script is saved")
+    parser.add_argument("--batch", metavar="MANIFEST", help="build every variant listed in a JSON manifest of assumption overrides")
+    parser.add_argument("--batch-report", metavar="PATH", help="write per-variant timing and peak RSS of a batch run as JSON")
+    args = parser.parse_args(argv)
+    if args.sections:
+        args.sections = args.sections.split(",")
+        unknown = [key for key in args.sections if key not in SECTIONS]
+        if unknown:
+            parser.error(f"unknown section(s): {', '.join(unknown)}")
+    return args
+
+# Runs a fresh interpreter with -X importtime that imports this module and initialises plotting,
+# then prints the top-level imports by cumulative time, with this module split into its own imports.
+def profile_startup(fast_start=False, top=12):
+    here = os.path.dirname(os.path.abspath(__file__)); module = os.path.splitext(os.path.basename(__file__))[0]
+    code = f"import {module} as g; g.FAST_START = {fast_start!r}; g.ensure_plotting()"
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=here, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    rows, children = [], []
+    for line in proc.stderr.splitlines():
+        fields = line.split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]; depth = (len(name) - len(name.lstrip())) // 2; name = name.strip()
+        self_ms, cumulative_ms = int(fields[0].split(":")[1]) / 1000, int(fields[1]) / 1000
+        if depth == 1:  # children are reported before their parent
+            children.append((cumulative_ms, f"{module} > {name}"))
+        elif depth == 0:
+            rows.extend(children + [(self_ms, f"{module} (module body)")] if name == module else [(cumulative_ms, name)])
+            children = []
+    total = sum(ms for ms, _ in rows)
+    print(f"Startup ({'fast-start' if fast_start else 'seaborn'} styling): {total:.0f} ms in imports, {wall * 1000:.0f} ms wall incl. interpreter")
+    for ms, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {ms:8.1f} ms  {ms / total * 100:5.1f}%  {name}")
+    return rows
+
+# The settings given on the command line, as {global name: value}; flags left out keep the module's values.
+def cli_settings(args):
+    given = {"FAST_START": args.fast_start or None, "FIG_SCALE": args.fig_scale, "DPI": args.dpi,
+             "IMAGE_FORMAT": args.image_format, "MAX_DOCX_KB": args.max_docx_kb, "IMAGE_REPORT": args.image_report or None}
+    return {name: value for name, value in given.items() if value is not None}
+
+def main(argv=None):
+    global FIG_SCALE, TRACING, DERIVED_CACHE_DIR
+    args = parse_args(argv); overrides = cli_settings(args)
+    globals().update(overrides); TRACING = bool(args.trace)
+    if args.profile_startup:
+        profile_startup(args.fast_start)
+        return
+    cache_dir = DERIVED_CACHE_DIR = None if args.no_cache else args.cache_dir
+    orders = None
+    if args.orders:
+        orders = ingest_orders(args.orders, args.orders_state or ORDER_STATE, args.orders_chunksize, args.orders_rebuild)
+    elif args.orders_state:
+        with open(args.orders_state, encoding="utf-8") as f:
+            orders = json.load(f)
+    if orders:
+        apply_order_aggregates(assumptions, orders)
+    if args.batch:
+        run_batch(args.batch, workers=args.workers, cache_dir=cache_dir, cache_max_mb=args.cache_max_mb,
+                  report_path=args.batch_report, sections=args.sections)
+    elif args.watch:
+        watch(args.output, cache_dir, args.cache_max_mb, orders, args.auto_tune, args.sections, workers=args.workers,
+              overrides=overrides)
+    else:
+        with span("build_outline", "stage"):
+            outline = build_outline(assumptions, args.sections)
+        with span("estimate_layout", "stage"):
+            est = auto_tune(outline) if args.auto_tune else estimate_layout(outline)
+        FIG_SCALE = est["fig_scale"]; print(layout_report(est))
+        if not args.estimate:
+            with span("render_charts", "stage"):
+                figs = render_charts(collect_chart_jobs(assumptions, section_figures(args.sections)), workers=args.workers,
+                                     cache_dir=cache_dir, cache_max_mb=args.cache_max_mb)
+            with span("build_document", "stage"):
+                write_docx(outline, figs, args.output, est["exhibits"])
+        if cache_dir:
+            evict_cache(cache_dir, args.cache_max_mb * 1024 * 1024)
+    if args.trace:
+        write_trace(args.trace)
+
+def build_document(assumptions, figs, output=OUTPUT_DOCX, exhibits=EXHIBIT_FIGURES, sections=None):
+    write_docx(build_outline(assumptions, sections), figs, output, exhibits)
+
+# Report sections, registered in document order by @section with their CLI key, TOC entry and the
+# `assumptions` keys and figures they use. Each appends its outline operations (see add_heading & co.),
+# ending with its page break; write_docx turns the outline into the DOCX. Sections without a TOC entry
+# are front matter and always built; the TOC follows them and lists the sections actually included.
+SECTIONS = {}  # key -> {"build", "toc", "assumptions", "figures"}
+
+def section(key, toc=None, assumptions=(), figures=()):
+    def register(build):
+        SECTIONS[key] = {"build": build, "toc": toc, "assumptions": tuple(assumptions), "figures": tuple(figures)}
+        return build
+    return register
+
+# Keys to build, in document order, with "toc" marking where the table of contents goes.
+def outline_keys(keys=None):
+    chosen = [key for key, sec in SECTIONS.items() if keys is None or key in keys or sec["toc"] is None]
+    front = [key for key in chosen if SECTIONS[key]["toc"] is None]
+    return front + ["toc"] + [key for key in chosen if key not in front]
+
+def section_figures(keys=None):
+    return list(dict.fromkeys(f for key in outline_keys(keys) if key != "toc" for f in SECTIONS[key]["figures"]))
+
+def add_toc(doc, keys):
+    add_heading(doc, "Table of Contents", level=1)
+    for key in keys:
+        if key != "toc" and SECTIONS[key]["toc"]:
+            add_para(doc, SECTIONS[key]["toc"])
+    add_page_break(doc)
+
+def build_section(doc, key, assumptions):
+    start = len(doc); SECTIONS[key]["build"](doc, assumptions)
+    extra = {op[1] for op in doc[start:] if op[0] == "figure"} - set(SECTIONS[key]["figures"])
+    if extra:
+        raise ValueError(f"section {key!r} adds figures it does not declare: {', '.join(sorted(extra))}")
+
+def build_outline(assumptions, keys=None):
+    doc = []; keys = outline_keys(keys)
+    for key in keys:
+        with span(key, "section"):
+            if key == "toc":
+                add_toc(doc, keys)
+            else:
+                build_section(doc, key, assumptions)
+    return doc
+
+@section("cover")
+def section_cover(doc, assumptions):
     add_heading(doc, "ReStep Footwear — Business Plan (Pakistan)", level=0)
     add_para(doc, "Social-commerce thrifted footwear for Pakistan’s youth", italic=True)
     add_para(doc, "Prepared by: ReStep Footwear (Partnership — Lahore)")
     add_para(doc, f"Date: {date.today().strftime('%B %Y')}")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # TOC
-    add_heading(doc, "Table of Contents", level=1)
-    for item in [
-        "1. Executive Summary",
-        "2. Business Description",
-        "3. Product/Service and Value Additions",
-        "4. Industry Analysis (Size, Trends, Porter’s Five Forces)",
-        "5. Macro Environment (PESTLE — Pakistan)",
-        "6. Market Segmentation & Target Market",
-        "7. Competitor Analysis",
-        "8. Customer Details & Relationship Management",
-        "9. Marketing Strategy (4Ps + Sales Cycle)",
-        "10. Operations & Logistics",
-        "11. Management Team, Governance, and Mentor",
-        "12. Product/Service Development Plan",
-        "13. Financial Projections (Assumptions, Break-even, 6-Month Models, Ratios)",
-        "14. Risks, Contingency Plan, Exit Strategy",
-        "15. Visual Exhibits",
-        "16. Data Appendix & Pakistan Statistics",
-        "17. Compliance Notes (GST, Import, Courier)",
-    ]:
-        add_para(doc, item)
-    doc.add_page_break()
-
-    # Executive Summary
+@section("exec", "1. Executive Summary", figures=("fig_revenue_capacity", "fig_cac_ltv"))
+def section_executive_summary(doc, assumptions):
     add_heading(doc, "1) Executive Summary", level=1)
     add_para(doc, "Lahore-based partnership selling authentic, cleaned, graded thrifted shoes via Instagram/TikTok with COD nationwide.")
     add_para(doc, "Ownership & profit/loss: Partner A 60%, Partner B 25%, Partner C 15%.")
@@ -229,34 +1478,35 @@ def main():
     add_para(doc, "12–18 month goals: PKR 600k+ monthly revenue; >3 repeats/year; CPA 250–350; 24–48h delivery in top cities.")
     add_para(doc, "Funding: PKR 700,000 self-funded — inventory, marketing, packaging/hygiene, storage/utilities, working capital.")
 
-    fig1 = chart_monthly_revenue_and_capacity(tmpdir, assumptions["monthly_pairs_series"], assumptions["blended_asp"], assumptions["capacity_pairs"])
-    doc.add_picture(fig1, width=Inches(FIG_SCALE)); add_caption(doc, "Figure ES-1: Monthly revenue and capacity utilization (6M)")
+    add_figure(doc, "fig_revenue_capacity"); add_caption(doc, "Figure ES-1: Monthly revenue and capacity utilization (6M)")
 
-    fig2 = chart_cac_ltv(tmpdir)
-    doc.add_picture(fig2, width=Inches(FIG_SCALE)); add_caption(doc, "Figure ES-2: CAC vs LTV (illustrative)")
-    doc.add_page_break()
+    add_figure(doc, "fig_cac_ltv"); add_caption(doc, "Figure ES-2: Cumulative LTV vs CAC by month since acquisition, with the share of customers whose CAC is recovered (cohort simulation, P10–P90 bands)")
+    add_page_break(doc)
 
-    # Business Description
+@section("business", "2. Business Description")
+def section_business_description(doc, assumptions):
     add_heading(doc, "2) Business Description", level=1)
     add_para(doc, "Legal: Partnership (AOP), Lahore. Ownership ratios aligned to profit/loss 60%/25%/15%.")
     add_para(doc, "Mission: Reliable, hygienically processed branded thrifted shoes at accessible prices, mobile-first social commerce, fast COD.")
 
-    # Product/Service
+@section("product", "3. Product/Service and Value Additions")
+def section_product_service(doc, assumptions):
     add_heading(doc, "3) Product/Service and Value Additions", level=1)
     add_para(doc, "Product: Sneakers/trainers, casual, lifestyle footwear.")
     add_para(doc, "Features: Authenticity checks; cleaning/deodorization; detailed photos & sizing; 3‑day exchange.")
     add_para(doc, "Value: Hygiene workflow; transparent grading; DM sizing support; trust signals; 1–3 day sales cycle; COD via TCS/Leopards.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Industry
+@section("industry", "4. Industry Analysis (Size, Trends, Porter’s Five Forces)", figures=("fig_porter",))
+def section_industry(doc, assumptions):
     add_heading(doc, "4) Industry Analysis (Pakistan)", level=1)
     add_para(doc, "Market: ~USD 5.8–5.89B (2025); ~600M pairs/year; 99% non-luxury; thrift <5–10% by volume (informal).")
     add_para(doc, "Trends: Youth-driven demand; mobile-first shopping; social commerce; COD; improving logistics.")
-    fig_porter = chart_porter(tmpdir)
-    doc.add_picture(fig_porter, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 4-1: Porter’s Five Forces — thrifted footwear in Pakistan")
-    doc.add_page_break()
+    add_figure(doc, "fig_porter"); add_caption(doc, "Figure 4-1: Porter’s Five Forces — thrifted footwear in Pakistan")
+    add_page_break(doc)
 
-    # PESTLE
+@section("pestle", "5. Macro Environment (PESTLE — Pakistan)")
+def section_pestle(doc, assumptions):
     add_heading(doc, "5) Macro Environment (PESTLE — Pakistan)", level=1)
     add_para(doc, "Political: Stabilization; IMF constraints; import policy for used goods may shift.")
     add_para(doc, "Economic: CPI ~5.6% (Dec 2025); SBP policy rate ~10.5%; USD/PKR ~280.")
@@ -264,110 +1514,138 @@ def main():
     add_para(doc, "Technological: Social commerce; wallets rising; strong couriers.")
     add_para(doc, "Legal: GST 18% on goods; provincial services tax 13–16%; Chapter 64 customs; IPO oversight for secondhand.")
     add_para(doc, "Environmental: Energy costs/load-shedding; efficient operations needed.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Market Segmentation & Target
+@section("market", "6. Market Segmentation & Target Market", figures=("fig_positioning",))
+def section_market_segmentation(doc, assumptions):
     add_heading(doc, "6) Market Segmentation & Target Market", level=1)
     add_para(doc, "Demographic: 16–35 youth; students; early professionals.")
     add_para(doc, "Geographic: Lahore; Karachi/Islamabad/Faisalabad/Multan/Peshawar; urban/peri-urban.")
     add_para(doc, "Psychographic: Trend-driven; value-conscious; sustainability-aware.")
     add_para(doc, "Behavioral: 2–3 purchases/year; drops/limited editions; high DM engagement.")
-    fig_pos = chart_positioning(tmpdir)
-    doc.add_picture(fig_pos, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 6-1: Positioning map — price vs quality")
-    doc.add_page_break()
+    add_figure(doc, "fig_positioning"); add_caption(doc, "Figure 6-1: Positioning map — price vs quality")
+    add_page_break(doc)
 
-    # Competitors
+@section("competitors", "7. Competitor Analysis", assumptions=("competitors",))
+def section_competitors(doc, assumptions):
     add_heading(doc, "7) Competitor Analysis", level=1)
     for c in assumptions["competitors"]:
         add_para(doc, f"- {c['name']} (Started: {c['started']}), Annual sales est.: PKR {c['annual_sales_m'][0]}–{c['annual_sales_m'][1]} million; Channels: {c['channels']}; Pricing: {c['pricing']}; Coverage: {c['coverage']}.")
 
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Customers & CRM
+@section("customers", "8. Customer Details & Relationship Management")
+def section_customers(doc, assumptions):
     add_heading(doc, "8) Customer Details & Relationship Management", level=1)
     add_para(doc, "Customers: ~100/month; students/young professionals; purchase frequency 2–3/year; budget share ~5–10% of fashion spend.")
     add_para(doc, "CRM: DMs + WhatsApp; post-purchase check-ins; loyalty discounts; early access; UGC reposts.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Marketing Strategy
+@section("marketing", "9. Marketing Strategy (4Ps + Sales Cycle)",
+         assumptions=("price_bands", "sales_mix", "blended_asp", "order_counts"), figures=("fig_funnel",))
+def section_marketing(doc, assumptions):
     add_heading(doc, "9) Marketing Strategy", level=1)
     add_para(doc, "Product: Cleaned, graded, authenticity checks; 3‑day exchange; fast COD; DM support; reviews.")
     add_para(doc, f"Pricing by grade: A: PKR {assumptions['price_bands']['A']}, B: PKR {assumptions['price_bands']['B']}, C: PKR {assumptions['price_bands']['C']}; Mix A/B/C: {assumptions['sales_mix']['A']*100:.0f}%/{assumptions['sales_mix']['B']*100:.0f}%/{assumptions['sales_mix']['C']*100:.0f}%; Blended ASP ≈ PKR {assumptions['blended_asp']:.0f}.")
     add_para(doc, "Placement: IG/TikTok; WhatsApp; Daraz (commission ~9% + payment fee ~2%).")
     add_para(doc, "Promotion: PKR 30k/month; ROAS 3x–5x; CPA PKR 300–500; creatives: cleaning transitions; unboxing; sizing guides; UGC/influencers.")
     add_para(doc, "Sales cycle: 1–3 days; DM→Order 15–25%; 6‑month repeat >30%.")
-    fig_funnel = chart_funnel(tmpdir)
-    doc.add_picture(fig_funnel, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 9-1: Sales funnel (illustrative)")
-    doc.add_page_break()
+    if assumptions["order_counts"]:
+        c = assumptions["order_counts"]
+        add_para(doc, f"Order data (last {c['months']} months): {c['orders']:,} orders; {c['repeat_customers']:,} customers ordered twice or more.")
+    add_figure(doc, "fig_funnel"); add_caption(doc, "Figure 9-1: Sales funnel (illustrative)")
+    add_page_break(doc)
 
-    # Operations & Logistics
+@section("operations", "10. Operations & Logistics",
+         assumptions=("vendor_terms", "capacity_pairs", "packaging_cost_per_pair", "monthly_utilities_storage"),
+         figures=("fig_courier_costs",))
+def section_operations(doc, assumptions):
     add_heading(doc, "10) Operations & Logistics", level=1)
     v = assumptions["vendor_terms"]
     add_para(doc, f"Vendors: Karachi wholesalers; Terms: {v['payment']}; Lead time: {v['lead_time_days']}.")
     add_para(doc, f"Yield (saleable): {v['yield_saleable_pct']*100:.0f}% with grade split A/B/C: {v['grade_split_saleable']['A']*100:.0f}%/{v['grade_split_saleable']['B']*100:.0f}%/{v['grade_split_saleable']['C']*100:.0f}%; Waste ~{v['waste_pct']*100:.0f}%.")
     add_para(doc, f"Capacity: ~{assumptions['capacity_pairs']} pairs/month; home-based storage; cleaning; photography.")
     add_para(doc, f"Courier: TCS & Leopards; Packaging per pair: PKR {assumptions['packaging_cost_per_pair']}; Utilities+storage monthly: PKR {assumptions['monthly_utilities_storage']}.")
-    fig_courier = chart_courier_costs(tmpdir, assumptions["city_courier_costs"])
-    doc.add_picture(fig_courier, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 10-1: Average courier costs by city (assumed)")
-    doc.add_page_break()
+    add_figure(doc, "fig_courier_costs"); add_caption(doc, "Figure 10-1: Average courier costs by city (assumed)")
+    add_page_break(doc)
 
-    # Management
+@section("management", "11. Management Team, Governance, and Mentor")
+def section_management(doc, assumptions):
     add_heading(doc, "11) Management Team, Governance, and Mentor", level=1)
     add_para(doc, "Org: Partners (Strategy/Finance/Compliance); Operations; Marketing; Fulfillment.")
     add_para(doc, "Board: Partner A & Partner B; Advisors: to be filled (retail/logistics; legal/tax).")
     add_para(doc, "Mentor: University SME mentor (contact to be added).")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Dev Plan
+@section("development", "12. Product/Service Development Plan")
+def section_dev_plan(doc, assumptions):
     add_heading(doc, "12) Product/Service Development Plan", level=1)
     add_para(doc, "Weekly: Bale sorting/grading; Cleaning/sanitization; Photography/listings. Monthly: Packaging stock; Influencer collabs.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Financials
+@section("financials", "13. Financial Projections (Assumptions, Break-even, 6-Month Models, Ratios)",
+         assumptions=("cogs_pct", "opex_pct", "return_rate_total", "blended_asp") + FIXED_COST_KEYS + COHORT_KEYS,
+         figures=("fig_break_even", "fig_pnl", "fig_ltv_distribution"))
+def section_financials(doc, assumptions):
     add_heading(doc, "13) Financial Projections", level=1)
-    add_para(doc, f"Assumptions: COGS ~60%; Opex ~15%; returns 7%; blended ASP ≈ PKR {assumptions['blended_asp']:.0f}.")
+    add_para(doc, f"Assumptions: COGS ~{assumptions['cogs_pct']*100:.0f}%; Opex ~{assumptions['opex_pct']*100:.0f}%; returns {assumptions['return_rate_total']*100:.0f}%; blended ASP ≈ PKR {assumptions['blended_asp']:.0f}.")
     contribution = assumptions["blended_asp"]*(1-assumptions["cogs_pct"])
-    fixed = assumptions["monthly_marketing_budget"] + assumptions["monthly_utilities_storage"] + assumptions["tools_other"]
+    fixed = fixed_monthly_costs(assumptions)
     add_para(doc, f"Break-even: Contribution per pair ≈ PKR {int(contribution)}; Fixed monthly ≈ PKR {fixed}; Break-even ≈ {int(round(fixed/contribution))} pairs/month.")
-    fig_be = chart_break_even(tmpdir, assumptions["blended_asp"], assumptions["cogs_pct"], fixed)
-    doc.add_picture(fig_be, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 13-1: Break-even chart")
+    add_figure(doc, "fig_break_even"); add_caption(doc, "Figure 13-1: Break-even chart")
 
-    fig_pnl = chart_pnl_trends(tmpdir, assumptions["monthly_pairs_series"], assumptions["blended_asp"], assumptions["cogs_pct"], assumptions["opex_pct"])
-    doc.add_picture(fig_pnl, width=Inches(FIG_SCALE)); add_caption(doc, "Figure 13-2: P&L trends (6M)")
+    add_figure(doc, "fig_pnl"); add_caption(doc, "Figure 13-2: P&L trends (6M)")
     add_para(doc, "Ratios (Month 6; illustrative): Current ratio > 10; Debt-to-equity = 0; ROE ~39%; Gross margin ~40%; Net margin ~25%.")
-    doc.add_page_break()
+    c = cohort_summary(cohort_inputs(assumptions)); ltv = c["ltv_p10_p50_p90"]
+    payback = "not reached" if c["payback_median_month"] is None else f"month {c['payback_median_month'] + 1:.0f}"
+    add_para(doc, f"Cohort simulation ({c['customers']:,} customers, {c['horizon']} months, seed {assumptions['cohort_model']['seed']}): first-year purchases ≈ {c['purchases_first_year']:.1f}; 6-month repeat ≈ {c['repeat_6m']*100:.0f}%; returns ≈ {c['return_rate']*100:.1f}% of orders.")
+    add_para(doc, f"LTV ({c['horizon']}M contribution): mean ≈ PKR {c['ltv_mean']:,.0f}; P10/P50/P90 ≈ PKR {ltv[0]:,.0f} / {ltv[1]:,.0f} / {ltv[2]:,.0f}; LTV/CAC ≈ {c['ltv_to_cac']:.1f}x; CAC recovered for {c['paid_back_share']*100:.0f}% of customers, median payback {payback}.")
+    add_figure(doc, "fig_ltv_distribution"); add_caption(doc, "Figure 13-3: Simulated LTV distribution (cohort simulation)")
+    add_page_break(doc)
 
-    # Risks
+@section("scenarios", "13A. Scenario & Sensitivity Analysis (Tornado, Break-even Heatmap)",
+         assumptions=SCENARIO_KEYS, figures=("fig_tornado", "fig_scenario_heatmap"))
+def section_scenarios(doc, assumptions):
+    add_heading(doc, "13A) Scenario & Sensitivity Analysis", level=1)
+    sweep = sweep_summary(scenario_inputs(assumptions), SCENARIO_POINTS)
+    base = sweep["base"]; ni = sweep["net_income_p10_p50_p90"]; be = sweep["break_even_p10_p50_p90"]
+    add_para(doc, "Method: price level, grade A share, COGS %, variable opex %, return rate and marketing budget are swept jointly around the base assumptions; revenue is net of returns and net income is after variable opex and fixed monthly costs.")
+    add_para(doc, f"Base case (Month 6 volume): Net revenue ≈ PKR {base['revenue']:,.0f}; Net income ≈ PKR {base['net_income']:,.0f}; Break-even ≈ {base['break_even']:.0f} pairs/month.")
+    add_para(doc, f"Sweep of {sweep['scenarios']:,} scenarios: {sweep['profitable_share']*100:.0f}% profitable at Month 6 volume; Net income P10/P50/P90 ≈ PKR {ni[0]:,.0f} / {ni[1]:,.0f} / {ni[2]:,.0f}; Break-even P10/P50/P90 ≈ {be[0]:.0f} / {be[1]:.0f} / {be[2]:.0f} pairs/month.")
+    add_figure(doc, "fig_tornado"); add_caption(doc, "Figure 13A-1: Net income sensitivity (tornado)")
+    add_figure(doc, "fig_scenario_heatmap"); add_caption(doc, "Figure 13A-2: Break-even pairs by price level and COGS (red: Month 6 volume)")
+    add_page_break(doc)
+
+@section("risks", "14. Risks, Contingency Plan, Exit Strategy")
+def section_risks(doc, assumptions):
     add_heading(doc, "14) Risks, Contingency Plan, Exit Strategy", level=1)
     add_para(doc, "Risks: Supply quality/consistency; customer trust; platform dependency.")
     add_para(doc, "Contingency: Multi-wholesaler sourcing; transparency & 3‑day exchange; diversify TikTok/WhatsApp; build Daraz; campus pop-ups.")
     add_para(doc, "Exit: Management buyout; strategic sale; orderly wind-down.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Visual Exhibits
+@section("exhibits", "15. Visual Exhibits", figures=EXHIBIT_FIGURES)
+def section_visual_exhibits(doc, assumptions):
     add_heading(doc, "15) Visual Exhibits (selection)", level=1)
-    for fig_name in ["fig_revenue_capacity.png","fig_cac_ltv.png","fig_porter.png","fig_courier_costs.png","fig_funnel.png","fig_pnl.png","fig_break_even.png","fig_positioning.png"]:
-        fig_path = os.path.join(tmpdir, fig_name)
-        if os.path.exists(fig_path):
-            doc.add_picture(fig_path, width=Inches(FIG_SCALE))
-            add_caption(doc, f"Exhibit: {fig_name.replace('_',' ').replace('.png','').title()}")
-    doc.add_page_break()
-
-    # Appendix
+    for fig_id in EXHIBIT_FIGURES:
+        add_figure(doc, fig_id, exhibit=True)
+        add_caption(doc, f"Exhibit: {fig_id.replace('_',' ').title()}", exhibit=fig_id)
+    add_page_break(doc)
+
+@section("appendix", "16. Data Appendix & Pakistan Statistics")
+def section_appendix(doc, assumptions):
     add_heading(doc, "16) Data Appendix & Pakistan Statistics (2025–2026)", level=1)
     add_para(doc, "Youth & Urbanization: Youth (15–35) ~35–40%; >60% under 30; Urbanization ~34–35%.")
     add_para(doc, "E-commerce & Social: ~$10.4B (2025); mobile-first; COD ~75%; social commerce up to ~35% by 2026.")
     add_para(doc, "Macro: CPI ~5.6% (Dec 2025); SBP policy rate ~10.5%; USD/PKR ~280.")
-    doc.add_page_break()
+    add_page_break(doc)
 
-    # Compliance
+@section("compliance", "17. Compliance Notes (GST, Import, Courier)")
+def section_compliance(doc, assumptions):
     add_heading(doc, "17) Compliance Notes (GST, Import, Courier)", level=1)
     add_para(doc, "GST: Standard 18% on goods; provincial services tax ~13–16%; potential e-commerce collection (e.g., 2% online).")
     add_para(doc, "Importing Used Footwear: Documentation, inspections, hygiene compliance; Chapter 64 PCT; IPO oversight.")
     add_para(doc, "Courier: TCS/Leopards nationwide; COD; tracking; TCS often for critical shipments; Leopards strong Tier‑II/III.")
 
-    doc.save(OUTPUT_DOCX)
-    print(f"Generated: {OUTPUT_DOCX}")
-
 if __name__ == "__main__":
     main()
\ No newline at end of file